@@ -0,0 +1,288 @@
+"""Offline throughput benchmark against a local fake job-board server.
+
+Usage (from src/):
+    python benchmark.py --mode pipeline --concurrency 1 2 4 --jobs 200
+    python benchmark.py --mode full --concurrency 1 4 --latency 0.2 --block-rate 0.05
+
+The fake server acts as an HTTP proxy for the real board domains, so job URLs
+keep their board-specific selectors and IDs. Each trial runs in a fresh
+subprocess with the ``benchmark`` settings profile (no politeness delays),
+scratch data and log directories, and ``SCRAPER_PROXY`` pointed at the server.
+The benchmark process itself logs into a scratch directory as well.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+if __name__ == '__main__' and sys.argv[1:2] != ['trial']:
+    # Set before config is imported, so this process logs into a scratch directory rather than the real logs;
+    # trials are given their own scratch directories by run_trial
+    SCRATCH_DIR = tempfile.TemporaryDirectory(prefix='scraper-benchmark-')
+    os.environ['SCRAPER_DATA_DIR'] = str(Path(SCRATCH_DIR.name) / 'data')
+    os.environ['SCRAPER_LOGS_DIR'] = str(Path(SCRATCH_DIR.name) / 'logs')
+
+from config import JOB_BOARD_SELECTORS, ensure_directories
+from utils import detect_job_board, logger
+
+# Boards whose job pages the parser recognises from their selectors alone
+BENCHMARK_BOARDS = ['indeed', 'glassdoor', 'ziprecruiter', 'monster']
+
+JOB_TITLES = ['Software Engineer', 'Data Analyst', 'Product Manager', 'DevOps Engineer', 'QA Engineer']
+COMPANIES = ['Acme Corp', 'Globex', 'Initech', 'Umbrella', 'Hooli']
+LOCATIONS = ['Remote', 'New York, NY', 'Austin, TX', 'Berlin', 'London']
+FILLER = ('We are looking for a motivated colleague to join our growing team. You will design, build '
+          'and maintain services used by thousands of customers every day. ')
+
+def job_url(board: str, job_id: int) -> str:
+    """Return a job page URL in the board's real URL shape."""
+    token = hashlib.md5(f'{board}{job_id}'.encode()).hexdigest()
+    if board == 'indeed':
+        return f'http://www.indeed.com/viewjob?jk={token[:16]}'
+    if board == 'glassdoor':
+        return f'http://www.glassdoor.com/job-listing/engineer?jl={job_id}'
+    if board == 'ziprecruiter':
+        return f'http://www.ziprecruiter.com/c/company/Job/engineer?jid={token[:12]}'
+    if board == 'monster':
+        uuid = f'{token[:8]}-{token[8:12]}-{token[12:16]}-{token[16:20]}-{token[20:32]}'
+        return f'http://www.monster.com/job-openings/engineer-{uuid}'
+    raise ValueError(f"No benchmark URL shape for board: {board}")
+
+def benchmark_job_urls(count: int) -> List[str]:
+    """Return ``count`` job URLs spread round-robin over the benchmark boards."""
+    return [job_url(BENCHMARK_BOARDS[i % len(BENCHMARK_BOARDS)], i) for i in range(count)]
+
+def _element(selector: str, text: str) -> str:
+    tag, _, css_class = selector.partition('.')
+    attrs = f' class="{css_class}"' if css_class else ''
+    return f'<{tag}{attrs}>{text}</{tag}>'
+
+class FakeJobBoardHandler(BaseHTTPRequestHandler):
+    """Serves synthetic search and job pages for the board named in the request's host.
+
+    Requests arrive either proxied (absolute URL in the request line) or direct,
+    with the board as the ``Host`` header.
+    """
+
+    def do_GET(self):
+        url = self.path if self.path.startswith('http') else f"http://{self.headers.get('Host', '')}{self.path}"
+        board = detect_job_board(url)
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+
+        if board not in JOB_BOARD_SELECTORS:
+            self.send_error(404)
+            return
+        if server.block_rate and server.random.random() < server.block_rate:
+            body = self._block_page()
+        elif 'search' in urlparse(url).path:
+            body = self._search_page(board, url)
+        else:
+            body = self._job_page(board, url)
+
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _job_fields(self, board: str, url: str, link: bool = False) -> List[str]:
+        """Return a job's title, company, location and date elements, identical on its card and its page."""
+        selectors = JOB_BOARD_SELECTORS[board]
+        seed = int(hashlib.md5(url.encode()).hexdigest()[:8], 16)
+        title = f'{JOB_TITLES[seed % len(JOB_TITLES)]} {seed % 1000}'
+        if link:
+            title = f'<a class="{selectors["url"].partition(".")[2]}" href="{url}">{title}</a>'
+        return [
+            _element(selectors['title'], title),
+            _element(selectors['company'], COMPANIES[seed // 7 % len(COMPANIES)]),
+            _element(selectors['location'], LOCATIONS[seed // 13 % len(LOCATIONS)]),
+            _element(selectors['date_posted'], f'{seed % 30} days ago'),
+        ]
+
+    def _job_page(self, board: str, url: str) -> str:
+        description = (FILLER * (self.server.page_size // len(FILLER) + 1))[:self.server.page_size]
+        fields = self._job_fields(board, url) + [_element(JOB_BOARD_SELECTORS[board]['description'], description)]
+        return f"<html><head><title>Job</title></head><body>{''.join(fields)}</body></html>"
+
+    def _search_page(self, board: str, url: str) -> str:
+        query = parse_qs(urlparse(url).query)
+        page = int((query.get('start') or query.get('page') or ['0'])[0])
+        cards = ''.join(
+            f'<div class="job-card result">{"".join(self._job_fields(board, job_url(board, page * 100 + i), True))}</div>'
+            for i in range(self.server.jobs_per_page)
+        )
+        padding = '<p>' + FILLER * 10 + '</p>'
+        return f'<html><body><div class="results">{cards}</div>{padding}</body></html>'
+
+    def _block_page(self) -> str:
+        return ('<html><body><h1>Please verify you are human</h1><div class="captcha"></div>'
+                f'<p>{FILLER * 10}</p></body></html>')
+
+    def log_message(self, format, *args):
+        pass
+
+def start_fake_board(host: str = '127.0.0.1', port: int = 0, latency: float = 0.0, block_rate: float = 0.0,
+                     page_size: int = 5000, jobs_per_page: int = 10, seed: int = 0) -> ThreadingHTTPServer:
+    """Serve the fake job boards in a background thread and return the server."""
+    server = ThreadingHTTPServer((host, port), FakeJobBoardHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.block_rate = block_rate
+    server.page_size = page_size
+    server.jobs_per_page = jobs_per_page
+    server.random = random.Random(seed)
+    threading.Thread(target=server.serve_forever, name='fake-job-board', daemon=True).start()
+    logger.info(f"Fake job boards listening on http://{host}:{server.server_address[1]}")
+    return server
+
+def run_pipeline_trial(urls: List[str], concurrency: int) -> Dict:
+    """Fetch, parse, dedup and store the URLs with ``concurrency`` requests-only scraper threads."""
+    from scraper import JobScraper
+    from storage import JobStorage
+    from deduplicator import Deduplicator
+
+    ensure_directories()
+    local = threading.local()
+    scrapers = []
+
+    def scrape(url):
+        if not hasattr(local, 'scraper'):
+            local.scraper = JobScraper(use_selenium=False, use_playwright=False)
+            scrapers.append(local.scraper)
+        return local.scraper.scrape_url(url)
+
+    storage = JobStorage()
+    deduplicator = Deduplicator(storage)
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            jobs = [job for job in executor.map(scrape, urls) if job]
+        unique_jobs = deduplicator.filter_duplicates(jobs)
+        if unique_jobs:
+            storage.save_jobs(unique_jobs)
+            deduplicator.record_jobs(unique_jobs)
+    finally:
+        for scraper in scrapers:
+            scraper.close()
+        deduplicator.existing_hashes.close()
+    return {'pages': len(urls), 'jobs': len(jobs), 'new_jobs': len(unique_jobs)}
+
+def run_full_trial(urls: List[str], concurrency: int, search_pages: int) -> Dict:
+    """Run the complete ``run_scraping`` path with ``concurrency`` worker processes."""
+    from main import run_scraping
+    from report import RUN_REPORT
+
+    sources = [{'url': url, 'source': url, 'interval': None, 'priority': 0, 'max_pages': 1} for url in urls]
+    if search_pages:
+        sources.append({'url': 'http://www.indeed.com/search?q=engineer', 'source': 'indeed',
+                        'interval': None, 'priority': 0, 'max_pages': search_pages})
+    succeeded = run_scraping(sources=sources, workers=concurrency)
+    dedup = RUN_REPORT.dedup
+    return {'pages': len(urls), 'jobs': dedup['scraped'], 'new_jobs': dedup['scraped'] - dedup['duplicates'], 'succeeded': succeeded}
+
+def run_trial(args) -> Dict:
+    """Run one trial in a fresh subprocess and measure its wall time, CPU time and peak memory."""
+    scratch = tempfile.TemporaryDirectory(prefix='scraper-benchmark-')
+    env = dict(os.environ, SCRAPER_PROFILE='benchmark', SCRAPER_PROXY=args.proxy,
+               SCRAPER_DATA_DIR=str(Path(scratch.name) / 'data'),
+               SCRAPER_LOGS_DIR=str(Path(scratch.name) / 'logs'))
+    command = [sys.executable, __file__, 'trial', '--mode', args.mode, '--concurrency', str(args.trial_concurrency),
+               '--jobs', str(args.jobs), '--search-pages', str(args.search_pages)]
+
+    usage_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.perf_counter()
+    with scratch:
+        completed = subprocess.run(command, env=env, stdout=subprocess.PIPE, cwd=Path(__file__).parent)
+    seconds = time.perf_counter() - start
+    usage_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    if completed.returncode != 0:
+        logger.error(f"Benchmark trial exited with code {completed.returncode}")
+        return {}
+    result = json.loads(completed.stdout.decode().strip().splitlines()[-1])
+    cpu_seconds = (usage_after.ru_utime + usage_after.ru_stime) - (usage_before.ru_utime + usage_before.ru_stime)
+    result.update({
+        'mode': args.mode,
+        'concurrency': args.trial_concurrency,
+        'seconds': round(seconds, 2),
+        'pages_per_second': round(result['pages'] / seconds, 2) if seconds else None,
+        'jobs_per_second': round(result['jobs'] / seconds, 2) if seconds else None,
+        'cpu_seconds': round(cpu_seconds, 2),
+        'cpu_percent': round(100 * cpu_seconds / seconds, 1) if seconds else None,
+    })
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline scraper throughput benchmark')
+    subparsers = parser.add_subparsers(dest='command')
+    trial_parser = subparsers.add_parser('trial', help=argparse.SUPPRESS)
+    for p in (parser, trial_parser):
+        p.add_argument('--mode', choices=['pipeline', 'full'], default='pipeline',
+                       help="'pipeline': fetch, parse, dedup and store with scraper threads; "
+                            "'full': run_scraping with worker processes (default: pipeline)")
+        p.add_argument('--jobs', type=int, default=200, help='Job pages per trial (default: 200)')
+        p.add_argument('--search-pages', type=int, default=0,
+                       help='Search result pages to read job cards from in full mode (default: 0)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4],
+                        help='Scraper threads (pipeline) or worker processes (full) per trial (default: 1 2 4)')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds the server waits per page (default: 0.05)')
+    parser.add_argument('--block-rate', type=float, default=0.0,
+                        help='Fraction of pages served as a captcha block page (default: 0)')
+    parser.add_argument('--page-size', type=int, default=5000,
+                        help='Characters of job description per page (default: 5000)')
+    parser.add_argument('--output', type=Path, help='Also write the results to this JSON file')
+    trial_parser.add_argument('--concurrency', type=int, default=1)
+    args = parser.parse_args()
+
+    if args.command == 'trial':
+        urls = benchmark_job_urls(args.jobs)
+        if args.mode == 'pipeline':
+            result = run_pipeline_trial(urls, args.concurrency)
+        else:
+            result = run_full_trial(urls, args.concurrency, args.search_pages)
+        # Peak RSS of the largest process in the trial, worker processes included (KB on Linux)
+        max_rss_kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                         resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+        result['max_rss_mb'] = round(max_rss_kb / 1024, 1)
+        print(json.dumps(result))
+        return
+
+    server = start_fake_board(latency=args.latency, block_rate=args.block_rate, page_size=args.page_size)
+    args.proxy = f'http://127.0.0.1:{server.server_address[1]}'
+    results = []
+    try:
+        for concurrency in args.concurrency:
+            args.trial_concurrency = concurrency
+            logger.info(f"Benchmark trial: {args.mode} mode, concurrency {concurrency}, {args.jobs} job pages")
+            result = run_trial(args)
+            if result:
+                results.append(result)
+    finally:
+        server.shutdown()
+
+    print(f"\n{'mode':<9}{'conc':>5}{'pages':>7}{'jobs':>7}{'seconds':>9}{'pages/s':>9}{'jobs/s':>9}"
+          f"{'cpu s':>8}{'cpu %':>7}{'rss MB':>8}")
+    for r in results:
+        print(f"{r['mode']:<9}{r['concurrency']:>5}{r['pages']:>7}{r['jobs']:>7}{r['seconds']:>9}"
+              f"{r['pages_per_second']:>9}{r['jobs_per_second']:>9}"
+              f"{r['cpu_seconds']:>8}{r['cpu_percent']:>7}{r['max_rss_mb']:>8}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
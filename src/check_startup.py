@@ -0,0 +1,75 @@
+"""Import-time regression check for the CLI.
+
+Usage (from src/):
+    python check_startup.py
+    python check_startup.py --max-import-ms 300
+
+Imports ``main`` in a fresh interpreter with ``-X importtime`` and fails (exit
+code 1) if any heavy dependency is loaded at import time, if importing takes
+longer than the budget, or if importing creates the data or log directories.
+Run it in CI or a container build so short-lived cron invocations stay fast.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+# Only the code paths that need these may import them
+HEAVY_MODULES = ['selenium', 'playwright', 'pandas', 'numpy', 'openpyxl', 'apscheduler', 'fake_useragent',
+                 'bs4', 'lxml', 'requests']
+
+def import_times(module: str = 'main') -> Dict[str, int]:
+    """Import a module in a fresh interpreter and return each loaded module's cumulative import time in µs."""
+    scratch = tempfile.mkdtemp(prefix='scraper-startup-')
+    env = dict(os.environ, SCRAPER_DATA_DIR=str(Path(scratch) / 'data'), SCRAPER_LOGS_DIR=str(Path(scratch) / 'logs'))
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], env=env,
+                               cwd=Path(__file__).parent, capture_output=True, text=True, check=True)
+    created = [name for name in ('data', 'logs') if (Path(scratch) / name).exists()]
+    if created:
+        raise RuntimeError(f"Importing {module} created directories: {', '.join(created)}")
+    os.rmdir(scratch)
+
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that the CLI imports quickly and without heavy dependencies')
+    parser.add_argument('--module', default='main', help='Module to import (default: main)')
+    parser.add_argument('--max-import-ms', type=float, default=250,
+                        help='Fail if importing the module takes longer than this (default: 250)')
+    args = parser.parse_args()
+
+    try:
+        times = import_times(args.module)
+    except (RuntimeError, subprocess.CalledProcessError) as e:
+        print(f"FAIL: {e}")
+        sys.exit(1)
+
+    failures = []
+    heavy = sorted({name.split('.')[0] for name in times} & set(HEAVY_MODULES))
+    if heavy:
+        failures.append(f"heavy modules imported at startup: {', '.join(heavy)}")
+    total_ms = times.get(args.module, 0) / 1000
+    if total_ms > args.max_import_ms:
+        failures.append(f"import {args.module} took {total_ms:.0f} ms (budget {args.max_import_ms:.0f} ms)")
+
+    print(f"import {args.module}: {total_ms:.0f} ms, {len(times)} modules")
+    slowest = sorted((item for item in times.items() if item[0] != args.module), key=lambda item: -item[1])
+    for name, micros in slowest[:10]:
+        print(f"  {micros / 1000:8.1f} ms  {name}")
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
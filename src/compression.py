@@ -0,0 +1,61 @@
+import zlib
+from collections import Counter
+from typing import List
+
+from config import TEXT_COMPRESSION_LEVEL, TEXT_DICT_SIZE
+
+class TextCompressor:
+    """Compress large text fields with zlib, optionally primed with a per-board dictionary."""
+
+    def __init__(self, level: int = TEXT_COMPRESSION_LEVEL):
+        self.level = level
+
+    def compress(self, text: str, dictionary: bytes = b'') -> bytes:
+        """Compress text, using the preset dictionary if one is given."""
+        if dictionary:
+            compressor = zlib.compressobj(self.level, zdict=dictionary)
+        else:
+            compressor = zlib.compressobj(self.level)
+        return compressor.compress(text.encode('utf-8')) + compressor.flush()
+
+    def decompress(self, data: bytes, dictionary: bytes = b'') -> str:
+        """Decompress text produced by ``compress`` with the same dictionary."""
+        if dictionary:
+            decompressor = zlib.decompressobj(zdict=dictionary)
+        else:
+            decompressor = zlib.decompressobj()
+        return (decompressor.decompress(data) + decompressor.flush()).decode('utf-8')
+
+    @staticmethod
+    def train_dictionary(samples: List[str], size: int = TEXT_DICT_SIZE) -> bytes:
+        """Build a preset dictionary from phrases that recur across sample texts.
+
+        Phrases are ranked by how many samples contain them times their length, and
+        the best ones are placed at the end of the dictionary where zlib can reference
+        them with the shortest distances.
+        """
+        counts = Counter()
+        for sample in samples:
+            words = sample.split()
+            phrases = set()
+            for n in (8, 4):
+                for i in range(len(words) - n + 1):
+                    phrases.add(' '.join(words[i:i + n]))
+            counts.update(phrases)
+
+        ranked = sorted(
+            (phrase for phrase, count in counts.items() if count > 1),
+            key=lambda phrase: counts[phrase] * len(phrase),
+            reverse=True
+        )
+
+        pieces = []
+        total = 0
+        for phrase in ranked:
+            piece = phrase.encode('utf-8') + b' '
+            if total + len(piece) > size:
+                continue
+            pieces.append(piece)
+            total += len(piece)
+
+        return b''.join(reversed(pieces))
@@ -1,19 +1,99 @@
 import os
+import socket
 from pathlib import Path
 
 # Base directory
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-# Path configurations
-DATA_DIR = BASE_DIR / "data"
-LOGS_DIR = BASE_DIR / "logs"
+# Path configurations; the environment variables let a benchmark or test run use scratch directories
+DATA_DIR = Path(os.environ.get('SCRAPER_DATA_DIR', BASE_DIR / "data"))
+LOGS_DIR = Path(os.environ.get('SCRAPER_LOGS_DIR', BASE_DIR / "logs"))
 INPUT_URLS_FILE = DATA_DIR / "input_urls.csv"
+INPUT_BATCH_SIZE = 1000  # Input sources discovered and queued at a time, so large seed lists stream
 OUTPUT_CSV_FILE = DATA_DIR / "jobs.csv"
 OUTPUT_JSON_FILE = DATA_DIR / "jobs.json"
+OUTPUT_JSONL_FILE = DATA_DIR / "jobs.jsonl"
 OUTPUT_EXCEL_FILE = DATA_DIR / "jobs.xlsx"
 
+# Canonical job store (the only file written during a scraping run)
+STORE_FILE = DATA_DIR / "jobs.db"
+STORE_BUSY_TIMEOUT = 30  # seconds to wait for another process holding the store write lock
+
 # Output format configuration
-OUTPUT_FORMATS = ['csv', 'json', 'excel']  # Formats to save
+OUTPUT_FORMATS = ['csv', 'json', 'excel']  # Formats to export from the store
+EXPORT_AFTER_SCHEDULED_RUN = True  # Regenerate stale exports after every --schedule/--daemon run
+STORAGE_CHUNK_SIZE = 10000  # Rows per chunk when streaming jobs from storage
+
+# Compression of large text fields in the job store
+COMPRESS_TEXT_FIELDS = True
+COMPRESSED_TEXT_FIELDS = ['job_description', 'requirements']
+TEXT_COMPRESSION_LEVEL = 6
+TEXT_DICT_SIZE = 32 * 1024  # bytes; zlib only uses the last 32KB of a preset dictionary
+TEXT_DICT_MIN_SAMPLES = 50  # texts needed before a board dictionary is trained
+TEXT_DICT_MAX_SAMPLES = 500
+
+# Deduplication
+USE_PERSISTENT_DEDUP_INDEX = True  # Keep seen job hashes on disk instead of reloading all history
+DEDUP_INDEX_FILE = DATA_DIR / "dedup_index.db"
+DEDUP_KEY_COLUMNS = ['job_title', 'company', 'location', 'date_posted']
+DEDUP_HASH_WORKERS = 1  # Processes used to hash history when (re)building the index
+DEDUP_BLOOM_CAPACITY = 1_000_000  # Initial Bloom filter capacity of the in-memory set; doubles as needed
+DEDUP_BLOOM_ERROR_RATE = 0.01
+DEDUP_RETENTION_DAYS = None  # Evict dedup keys not seen for this many days; None keeps them forever
+
+# Shared dedup service, for several hosts scraping overlapping boards
+DEDUP_BACKEND = 'local'  # 'local' (in-process set or index) or 'service' (dedup servers below)
+DEDUP_SERVICE_ADDRESSES = ['127.0.0.1:8765']  # One host:port per shard, listed in the same order on every host
+DEDUP_SERVICE_BATCH_SIZE = 1000  # Hashes per request
+DEDUP_SERVICE_PIPELINE_DEPTH = 8  # Requests in flight per shard before waiting for a reply
+DEDUP_SERVICE_TIMEOUT = 30  # seconds
+DEDUP_HOST_ID = os.environ.get('SCRAPER_HOST_ID') or socket.gethostname()  # Each host merges its store once
+
+# Near-duplicate detection (same posting syndicated across boards with different formatting)
+NEAR_DEDUP_ENABLED = False
+NEAR_DEDUP_INDEX_FILE = DATA_DIR / "near_dedup_index.db"
+NEAR_DEDUP_THRESHOLD = 0.8  # Estimated Jaccard similarity above which jobs are considered the same
+NEAR_DEDUP_NUM_PERM = 128  # MinHash permutations per signature
+NEAR_DEDUP_SHINGLE_SIZE = 3  # Words per shingle
+
+# Pre-fetch URL dedup: skip job pages fetched recently
+SKIP_SEEN_URLS = True
+SEEN_URLS_FILE = DATA_DIR / "seen_urls.db"
+URL_REVISIT_TTL_HOURS = 24 * 7  # Refetch a job page after this long; None never refetches
+
+# Crash-safe crawl frontier: per-URL state and results, resumable with --resume
+FRONTIER_FILE = DATA_DIR / "frontier.db"
+FRONTIER_MAX_ATTEMPTS = 3  # Attempts per job URL before it is given up on
+FRONTIER_RETRY_BACKOFF_MINUTES = 30  # Delay before the first retry in a later run; doubles per attempt
+FRONTIER_FAILED_COOLDOWN_HOURS = 24  # Forget URLs out of attempts after this long so they can be requeued
+
+# Multi-process scraping (--workers)
+SCRAPER_WORKERS = 1  # Processes scraping job pages, each with its own browser
+RATE_LIMIT_FILE = DATA_DIR / "rate_limits.db"
+HOST_MIN_INTERVAL_SECONDS = 4  # Minimum spacing between requests to one host across all workers
+
+# Daemon mode (--daemon): components kept warm between scheduled runs are rebuilt past these limits
+RUNTIME_MAX_AGE_HOURS = 24
+RUNTIME_MAX_RSS_MB = 1024  # Resident memory of the scraper process
+
+# Prometheus-format metrics endpoint, served in schedule and daemon mode
+METRICS_ENABLED = True
+METRICS_HOST = '127.0.0.1'
+METRICS_PORT = 9108
+
+# Logging: written by a background thread so file I/O stays off the scraping path
+LOG_FORMAT = os.environ.get('SCRAPER_LOG_FORMAT', 'text')  # 'text', or 'json' for one JSON object per line
+LOG_MAX_BYTES = 10 * 1024 * 1024  # Rotate scraper.log at this size
+LOG_BACKUP_COUNT = 5  # Rotated files kept (scraper.log.1 ... scraper.log.5)
+
+# Per-run JSON performance reports (URL outcomes, tier latencies, sleep vs work time)
+RUN_REPORTS_DIR = LOGS_DIR / "run_reports"
+
+# Profiles captured with --profile (cProfile stats or collapsed stacks, plus per-stage allocations)
+PROFILES_DIR = LOGS_DIR / "profiles"
+PROFILE_SAMPLE_INTERVAL = 0.005  # seconds between stack samples in sample mode
+PROFILE_TOP_N = 30  # Functions and allocation sites listed per report
+PROFILE_TRACEMALLOC_FRAMES = 1  # Stack depth kept per allocation; more frames cost more memory
 
 # Scraping configurations
 SCRAPING_INTERVAL_HOURS = 2
@@ -21,6 +101,56 @@ MAX_RETRIES = 3
 RETRY_DELAY = 5  # seconds
 REQUEST_TIMEOUT = 30  # seconds
 CONCURRENT_REQUESTS = 5
+SCRAPER_PROXY = os.environ.get('SCRAPER_PROXY') or None  # HTTP proxy for every fetch, e.g. 'http://host:port'
+
+# Delays (seconds) that keep the scraper polite; the benchmark profile removes them
+PAGE_DELAY_RANGE = (4, 6)  # Before each job page
+REQUESTS_DELAY_RANGE = (0.5, 1.5)  # Before each plain HTTP fetch
+BROWSER_SETTLE_RANGE = (2, 4)  # After a Playwright page loads, for dynamic content
+SELENIUM_SETTLE_SECONDS = 3  # After a Selenium page loads
+SEARCH_PAGE_DELAY = 5  # Between search result pages
+URL_DELAY_BASE = 3  # Between job pages: base plus 0..URL_DELAY_SPREAD-1 seconds, cycling
+URL_DELAY_SPREAD = 4
+
+# Per-source scheduling; the input file may add interval (hours), priority and max_pages columns
+DEFAULT_SOURCE_PRIORITY = 0  # Higher-priority sources run first when several are due
+DEFAULT_MAX_PAGES = 1  # Search result pages followed per source
+EXTRACT_SEARCH_CARDS = True  # Parse jobs from search result cards rather than only collecting their links
+SEARCH_CARD_REQUIRED_FIELDS = ['job_title', 'company', 'location']  # A card with all of these skips its job page
+SCHEDULER_TICK_SECONDS = 60  # How often the scheduler looks for due sources
+SCHEDULER_MAX_SOURCES_PER_RUN = 10  # Crawl budget per run; other due sources wait for the next tick
+ADAPTIVE_MIN_INTERVAL_HOURS = 0.5
+ADAPTIVE_MAX_INTERVAL_HOURS = 48
+ADAPTIVE_HIGH_YIELD_JOBS = 20  # New jobs in one run that make a source's interval shorter
+ADAPTIVE_SPEEDUP = 0.5  # Interval multiplier after a high-yield run
+ADAPTIVE_BACKOFF = 1.5  # Interval multiplier after a run with no new jobs
+SCHEDULER_MISFIRE_GRACE_SECONDS = 15 * 60  # Fires delayed by up to this long still run, coalesced into one
+SCHEDULE_DELAY_AFTER_FINISH_MINUTES = None  # Start each run this long after the previous one finishes instead
+
+# Query parameter, step and first value used to page through search results per board
+SEARCH_PAGE_PARAMS = {
+    'indeed': ('start', 10, 0),
+    'linkedin': ('start', 25, 0),
+    'ziprecruiter': ('page', 1, 1),
+    'monster': ('page', 1, 1),
+    'simplyhired': ('pn', 1, 1),
+    'wellfound': ('page', 1, 1),
+    'careerbuilder': ('page_number', 1, 1),
+    'usajobs': ('p', 1, 1),
+}
+
+# Search query parameters per board; a URL carrying one is a search page even without 'search' in it
+SEARCH_QUERY_PARAMS = {
+    'indeed': ['q'],
+    'linkedin': ['keywords'],
+    'glassdoor': ['sc.keyword'],
+    'ziprecruiter': ['search'],
+    'monster': ['q'],
+    'simplyhired': ['q'],
+    'wellfound': ['keyword'],
+    'careerbuilder': ['keywords'],
+    'usajobs': ['k'],
+}
 
 
 # Scraping anti-detection settings
@@ -45,6 +175,11 @@ USER_AGENTS = [
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.1 Safari/605.1.15"
 ]
 
+# Header profile pool (user agent, language, client hints), loaded once and refreshed in the background
+USER_AGENT_POOL_SIZE = 50  # Profiles drawn from fake_useragent; USER_AGENTS is the fallback
+USER_AGENT_REFRESH_HOURS = 24  # None disables the background refresh
+USER_AGENT_STICKY_PER_DOMAIN = True  # Reuse one profile per host so a session looks like one browser
+
 # Job board specific selectors (to be extended)
 JOB_BOARD_SELECTORS = {
       "simplyhired": {
@@ -195,6 +330,31 @@ JOB_BOARD_SELECTORS = {
 
 
 
-# Ensure directories exist
-os.makedirs(DATA_DIR, exist_ok=True)
-os.makedirs(LOGS_DIR, exist_ok=True)
\ No newline at end of file
+# Patterns extracting a board's canonical job ID from a job URL (first group is the ID)
+JOB_ID_PATTERNS = {
+    "indeed": r"[?&]v?jk=([0-9a-fA-F]+)",
+    "linkedin": r"(?:/jobs/view/(?:[^/?#]*-)?|[?&]currentJobId=)(\d+)",
+    "glassdoor": r"[?&](?:jobListingId|jl)=(\d+)",
+    "ziprecruiter": r"[?&]jid=([\w-]+)",
+    "monster": r"/job-openings/[^?#]*?([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})",
+    "simplyhired": r"/job/([\w-]+)",
+    "wellfound": r"/jobs/(\d+)",
+    "careerbuilder": r"/job/([\w-]+)",
+    "usajobs": r"/job/(\d+)",
+}
+
+
+# Named setting overrides, selected with the SCRAPER_PROFILE environment variable
+SCRAPER_PROFILE = os.environ.get('SCRAPER_PROFILE', '')
+if SCRAPER_PROFILE == 'benchmark':
+    # Offline runs against the fake job-board server: measure the work, not the politeness
+    PAGE_DELAY_RANGE = REQUESTS_DELAY_RANGE = BROWSER_SETTLE_RANGE = (0, 0)
+    SELENIUM_SETTLE_SECONDS = SEARCH_PAGE_DELAY = URL_DELAY_BASE = 0
+    URL_DELAY_SPREAD = 1
+    HOST_MIN_INTERVAL_SECONDS = 0
+    REQUEST_TIMEOUT = 10
+
+def ensure_directories() -> None:
+    """Create the data and log directories; called by commands that write to them, not at import."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    os.makedirs(LOGS_DIR, exist_ok=True)
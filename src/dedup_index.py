@@ -0,0 +1,430 @@
+import math
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Dict, Tuple, Union, Sequence
+
+import numpy as np
+
+from utils import logger, canonical_job_key
+from config import (DEDUP_INDEX_FILE, STORE_BUSY_TIMEOUT, DEDUP_BLOOM_CAPACITY, DEDUP_BLOOM_ERROR_RATE,
+                    SEEN_URLS_FILE, URL_REVISIT_TTL_HOURS)
+
+def hash_to_key(job_hash: str) -> int:
+    """Fold a hex job hash into the signed 64-bit integer used as the index key."""
+    key = int(job_hash[:16], 16)
+    return key - (1 << 64) if key >= (1 << 63) else key
+
+def hashes_to_keys(job_hashes: Iterable[str]) -> np.ndarray:
+    """Convert hex job hashes to an int64 array of index keys."""
+    return np.array([int(job_hash[:16], 16) for job_hash in job_hashes], dtype=np.uint64).view(np.int64)
+
+class BloomFilter:
+    """Bit-array Bloom filter over 64-bit keys, sized for a capacity and false-positive rate."""
+
+    def __init__(self, capacity: int = DEDUP_BLOOM_CAPACITY, error_rate: float = DEDUP_BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, keys: np.ndarray) -> np.ndarray:
+        """Return a (len(keys), num_hashes) array of bit positions using double hashing."""
+        h1 = keys.view(np.uint64)
+        h2 = (h1 * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(17) | np.uint64(1)
+        steps = np.arange(self.num_hashes, dtype=np.uint64)
+        return (h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(self.num_bits)
+
+    def add_many(self, keys: np.ndarray, batch_size: int = 100000) -> None:
+        # Batched so bulk loads do not materialize num_hashes positions for every key at once
+        for start in range(0, len(keys), batch_size):
+            positions = self._positions(keys[start:start + batch_size]).ravel()
+            masks = np.left_shift(1, positions & np.uint64(7)).astype(np.uint8)
+            np.bitwise_or.at(self.bits, positions >> np.uint64(3), masks)
+
+    def contains_many(self, keys: np.ndarray) -> np.ndarray:
+        """Return False for keys that are definitely absent, True for keys that may be present."""
+        positions = self._positions(keys)
+        bits = (self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+        return bits.all(axis=1)
+
+def seen_timestamps(seen_at: Union[None, float, Sequence[float], np.ndarray], count: int) -> np.ndarray:
+    """Expand a seen-at value (None for now, a scalar, or one per hash) to a uint32 epoch-seconds array."""
+    if seen_at is None:
+        seen_at = time.time()
+    if np.isscalar(seen_at):
+        return np.full(count, int(seen_at), dtype=np.uint32)
+    return np.asarray(seen_at, dtype=np.float64).astype(np.uint32)
+
+class DedupBackend:
+    """Set of job hashes used by ``Deduplicator``: implemented in memory, in SQLite, or by the dedup service."""
+
+    complete = False
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __contains__(self, job_hash: str) -> bool:
+        return bool(self.contains_many([job_hash])[0])
+
+    def contains_many(self, job_hashes: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    def add_many(self, job_hashes: List[str], seen_at=None) -> None:
+        raise NotImplementedError
+
+    def add(self, job_hash: str) -> None:
+        self.add_many([job_hash])
+
+    def update(self, job_hashes: Iterable[str], seen_at=None) -> None:
+        self.add_many(list(job_hashes), seen_at)
+
+    def check_and_add(self, job_hashes: List[str], seen_at=None) -> np.ndarray:
+        """Return which hashes were already present, adding the rest and refreshing the known ones."""
+        known = self.contains_many(job_hashes)
+        self.add_many(job_hashes, seen_at)
+        return known
+
+    def touch_many(self, job_hashes: List[str], seen_at=None) -> None:
+        raise NotImplementedError
+
+    def evict_older_than(self, cutoff: float) -> int:
+        raise NotImplementedError
+
+    @property
+    def is_complete(self) -> bool:
+        """Whether the set holds the full job history."""
+        return self.complete
+
+    def mark_complete(self, complete: bool = True) -> None:
+        self.complete = complete
+
+    @property
+    def completed_hosts(self) -> set:
+        return self.__dict__.setdefault('_completed_hosts', set())
+
+    def is_complete_for(self, host: str) -> bool:
+        """Whether a host sharing this set (through the dedup service) has merged its full job history."""
+        return host in self.completed_hosts
+
+    def mark_complete_for(self, host: str, complete: bool = True) -> None:
+        if complete:
+            self.completed_hosts.add(host)
+        else:
+            self.completed_hosts.discard(host)
+
+    def remove_many(self, job_hashes: List[str]) -> None:
+        """Remove hashes, e.g. ones claimed for jobs whose save then failed."""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+class CompactHashSet(DedupBackend):
+    """In-memory set of job hashes stored as sorted 64-bit keys with a Bloom filter in front.
+
+    Uses about 8 bytes per job for the key and 8 more for first/last-seen timestamps,
+    plus roughly 10 bits of Bloom filter, instead of the 100+ bytes a Python set of
+    hex strings costs. New keys collect in a small sorted buffer that is merged into
+    the main arrays once it grows past a fraction of them.
+    """
+
+    def __init__(self, capacity: int = DEDUP_BLOOM_CAPACITY, error_rate: float = DEDUP_BLOOM_ERROR_RATE):
+        self.initial_capacity = capacity
+        self._main = self._empty()
+        self._pending = self._empty()
+        self.bloom = BloomFilter(capacity, error_rate)
+
+    @staticmethod
+    def _empty() -> Dict[str, np.ndarray]:
+        return {
+            'keys': np.empty(0, dtype=np.int64),
+            'first_seen': np.empty(0, dtype=np.uint32),
+            'last_seen': np.empty(0, dtype=np.uint32),
+        }
+
+    def __len__(self) -> int:
+        return len(self._main['keys']) + len(self._pending['keys'])
+
+    def contains_many(self, job_hashes: List[str]) -> np.ndarray:
+        """Check a batch of hashes, returning a boolean array."""
+        return self._contains_keys(hashes_to_keys(job_hashes))
+
+    def _contains_keys(self, keys: np.ndarray) -> np.ndarray:
+        result = self.bloom.contains_many(keys) if len(keys) else np.zeros(0, dtype=bool)
+        candidates = np.flatnonzero(result)
+        if candidates.size:
+            result[candidates] = self._locate(self._main, keys[candidates])[1] | \
+                self._locate(self._pending, keys[candidates])[1]
+        return result
+
+    @staticmethod
+    def _locate(part: Dict[str, np.ndarray], keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (positions, found) for keys in one of the sorted key arrays."""
+        sorted_keys = part['keys']
+        if not len(sorted_keys):
+            return np.zeros(len(keys), dtype=np.int64), np.zeros(len(keys), dtype=bool)
+        positions = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+        return positions, sorted_keys[positions] == keys
+
+    def touch_many(self, job_hashes: List[str], seen_at=None) -> None:
+        """Update the last-seen time of hashes already in the set."""
+        keys = hashes_to_keys(job_hashes)
+        self._touch_keys(keys, seen_timestamps(seen_at, len(keys)))
+
+    def _touch_keys(self, keys: np.ndarray, seen: np.ndarray) -> None:
+        for part in (self._main, self._pending):
+            positions, found = self._locate(part, keys)
+            np.maximum.at(part['last_seen'], positions[found], seen[found])
+
+    def add_many(self, job_hashes: List[str], seen_at=None) -> None:
+        """Add a batch of hashes, refreshing the last-seen time of those already present."""
+        keys = hashes_to_keys(job_hashes)
+        if not len(keys):
+            return
+        seen = seen_timestamps(seen_at, len(keys))
+
+        known = self._contains_keys(keys)
+        if known.any():
+            self._touch_keys(keys[known], seen[known])
+        keys, first = np.unique(keys[~known], return_index=True)
+        if not len(keys):
+            return
+        seen = seen[~known][first]
+
+        # New keys are disjoint from both parts, so a concatenate-and-sort merge is enough
+        self.bloom.add_many(keys)
+        self._pending = self._merge(self._pending, {'keys': keys, 'first_seen': seen, 'last_seen': seen})
+        if len(self._pending['keys']) > max(65536, len(self._main['keys']) // 8):
+            self._main = self._merge(self._main, self._pending)
+            self._pending = self._empty()
+
+        if len(self) > self.bloom.capacity:
+            self._rebuild_bloom(self.bloom.capacity * 2)
+
+    @staticmethod
+    def _merge(left: Dict[str, np.ndarray], right: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        merged = {name: np.concatenate([left[name], right[name]]) for name in left}
+        order = np.argsort(merged['keys'], kind='stable')
+        return {name: values[order] for name, values in merged.items()}
+
+    def evict_older_than(self, cutoff: float) -> int:
+        """Drop every hash last seen before ``cutoff`` (epoch seconds) and return how many were removed."""
+        before = len(self)
+        for name in ('_main', '_pending'):
+            part = getattr(self, name)
+            keep = part['last_seen'] >= cutoff
+            setattr(self, name, {column: values[keep] for column, values in part.items()})
+
+        evicted = before - len(self)
+        if evicted:
+            # Bloom filters cannot delete, so rebuild from the surviving keys
+            self._rebuild_bloom(max(self.initial_capacity, len(self) * 2))
+        return evicted
+
+    def clear(self) -> None:
+        """Remove every hash from the set."""
+        self._main = self._empty()
+        self._pending = self._empty()
+        self.bloom = BloomFilter(self.initial_capacity, self.bloom.error_rate)
+        self.complete = False
+        self.completed_hosts.clear()
+
+    def remove_many(self, job_hashes: List[str]) -> None:
+        """Remove a batch of hashes, rebuilding the Bloom filter from the remaining keys."""
+        keys = hashes_to_keys(job_hashes)
+        if not len(keys):
+            return
+        for name in ('_main', '_pending'):
+            part = getattr(self, name)
+            keep = ~np.isin(part['keys'], keys)
+            setattr(self, name, {column: values[keep] for column, values in part.items()})
+        self._rebuild_bloom(self.bloom.capacity)
+
+    def _rebuild_bloom(self, capacity: int) -> None:
+        """Rebuild the Bloom filter at the given capacity so the false-positive rate stays bounded."""
+        self.bloom = BloomFilter(capacity, self.bloom.error_rate)
+        self.bloom.add_many(self._main['keys'])
+        self.bloom.add_many(self._pending['keys'])
+
+class HashIndex(DedupBackend):
+    """Persistent set of job hashes backed by SQLite.
+
+    Opening the index does not read it, so startup cost is independent of how many
+    jobs have been seen. Hashes are stored as 64-bit integer keys with the times
+    they were first and last seen, so entries outside a retention window can be
+    evicted in bulk.
+    """
+
+    def __init__(self, index_file: Path = DEDUP_INDEX_FILE):
+        self.index_file = index_file
+        self.conn = sqlite3.connect(index_file, timeout=STORE_BUSY_TIMEOUT, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_hashes (key INTEGER PRIMARY KEY, first_seen REAL, last_seen REAL)"
+            )
+            self.conn.execute("CREATE TABLE IF NOT EXISTS index_meta (key TEXT PRIMARY KEY, value TEXT)")
+
+            # Indexes built before timestamps were tracked start their window now
+            existing = {row[1] for row in self.conn.execute("PRAGMA table_info(job_hashes)")}
+            if 'last_seen' not in existing:
+                now = time.time()
+                self.conn.execute("ALTER TABLE job_hashes ADD COLUMN first_seen REAL")
+                self.conn.execute("ALTER TABLE job_hashes ADD COLUMN last_seen REAL")
+                self.conn.execute("UPDATE job_hashes SET first_seen = ?, last_seen = ?", (now, now))
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_job_hashes_last_seen ON job_hashes (last_seen)")
+
+    @property
+    def is_complete(self) -> bool:
+        """Whether the index was fully built from the store (False for new or interrupted builds)."""
+        row = self.conn.execute("SELECT value FROM index_meta WHERE key = 'complete'").fetchone()
+        return bool(row and row[0] == '1')
+
+    def mark_complete(self, complete: bool = True) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO index_meta (key, value) VALUES ('complete', ?)", ('1' if complete else '0',)
+            )
+
+    def is_complete_for(self, host: str) -> bool:
+        row = self.conn.execute("SELECT value FROM index_meta WHERE key = ?", (f'complete:{host}',)).fetchone()
+        return bool(row and row[0] == '1')
+
+    def mark_complete_for(self, host: str, complete: bool = True) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO index_meta (key, value) VALUES (?, ?)",
+                (f'complete:{host}', '1' if complete else '0')
+            )
+
+    def __contains__(self, job_hash: str) -> bool:
+        row = self.conn.execute("SELECT 1 FROM job_hashes WHERE key = ?", (hash_to_key(job_hash),)).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM job_hashes").fetchone()[0]
+
+    def contains_many(self, job_hashes: List[str]) -> np.ndarray:
+        """Check a batch of hashes with a few IN queries, returning a boolean array."""
+        keys = [hash_to_key(job_hash) for job_hash in job_hashes]
+        found = set()
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ', '.join('?' for _ in batch)
+            found.update(
+                row[0] for row in
+                self.conn.execute(f"SELECT key FROM job_hashes WHERE key IN ({placeholders})", batch)
+            )
+        return np.array([key in found for key in keys], dtype=bool)
+
+    def add_many(self, job_hashes: List[str], seen_at=None) -> None:
+        self.update(job_hashes, seen_at)
+
+    def add(self, job_hash: str) -> None:
+        """Add a single hash, committing immediately."""
+        self.update([job_hash])
+
+    def update(self, job_hashes: Iterable[str], seen_at=None) -> None:
+        """Add many hashes in one transaction, refreshing the last-seen time of existing ones."""
+        job_hashes = list(job_hashes)
+        seen = seen_timestamps(seen_at, len(job_hashes)).tolist()
+        # Sorted keys insert into the B-tree with far fewer page splits
+        rows = sorted(zip((hash_to_key(job_hash) for job_hash in job_hashes), seen))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO job_hashes (key, first_seen, last_seen) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET last_seen = MAX(last_seen, excluded.last_seen)",
+                ((key, seen_at, seen_at) for key, seen_at in rows)
+            )
+
+    def touch_many(self, job_hashes: List[str], seen_at=None) -> None:
+        """Update the last-seen time of hashes already in the index."""
+        seen = seen_timestamps(seen_at, len(job_hashes)).tolist()
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE job_hashes SET last_seen = MAX(last_seen, ?) WHERE key = ?",
+                ((seen_at, hash_to_key(job_hash)) for job_hash, seen_at in zip(job_hashes, seen))
+            )
+
+    def remove_many(self, job_hashes: List[str]) -> None:
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM job_hashes WHERE key = ?", ((hash_to_key(job_hash),) for job_hash in job_hashes)
+            )
+
+    def evict_older_than(self, cutoff: float) -> int:
+        """Delete every hash last seen before ``cutoff`` (epoch seconds) and return how many were removed."""
+        with self.conn:
+            return self.conn.execute("DELETE FROM job_hashes WHERE last_seen < ?", (cutoff,)).rowcount
+
+    def clear(self) -> None:
+        """Remove every hash from the index."""
+        with self.conn:
+            self.conn.execute("DELETE FROM job_hashes")
+            self.conn.execute("INSERT OR REPLACE INTO index_meta (key, value) VALUES ('complete', '0')")
+            self.conn.execute("DELETE FROM index_meta WHERE key LIKE 'complete:%'")
+        logger.info(f"Cleared dedup index: {self.index_file}")
+
+    def close(self) -> None:
+        self.conn.close()
+
+class SeenUrlIndex:
+    """Persistent record of job pages already fetched, keyed by canonical job ID.
+
+    Consulted between discovery and fetch so repeat runs skip pages we already
+    have until their revisit TTL expires.
+    """
+
+    def __init__(self, index_file: Path = SEEN_URLS_FILE, ttl_hours: Optional[float] = URL_REVISIT_TTL_HOURS):
+        self.index_file = index_file
+        self.ttl_hours = ttl_hours
+        self.conn = sqlite3.connect(index_file, timeout=STORE_BUSY_TIMEOUT, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS seen_urls (url_key TEXT PRIMARY KEY, last_fetched REAL)")
+
+    def filter_unseen(self, urls: List[str]) -> List[str]:
+        """Return the URLs that have not been fetched within the TTL, dropping repeats of the same job."""
+        keys = [canonical_job_key(url) for url in urls]
+        cutoff = 0 if self.ttl_hours is None else time.time() - self.ttl_hours * 3600
+        unique = list(dict.fromkeys(keys))
+
+        fresh = set()
+        for start in range(0, len(unique), 500):
+            batch = unique[start:start + 500]
+            placeholders = ', '.join('?' for _ in batch)
+            fresh.update(
+                row[0] for row in self.conn.execute(
+                    f"SELECT url_key FROM seen_urls WHERE url_key IN ({placeholders}) AND last_fetched >= ?",
+                    batch + [cutoff]
+                )
+            )
+
+        unseen = []
+        queued = set()
+        for url, key in zip(urls, keys):
+            if key not in fresh and key not in queued:
+                unseen.append(url)
+                queued.add(key)
+
+        logger.info(f"Skipping {len(urls) - len(unseen)} already-fetched or repeated job URLs, {len(unseen)} to fetch")
+        return unseen
+
+    def mark_fetched(self, urls: List[str]) -> None:
+        """Record that these job pages were fetched now."""
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO seen_urls (url_key, last_fetched) VALUES (?, ?)",
+                [(canonical_job_key(url), now) for url in urls]
+            )
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,219 @@
+import json
+import socket
+import socketserver
+import threading
+from collections import deque
+from itertools import zip_longest
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils import logger
+from dedup_index import DedupBackend, CompactHashSet, HashIndex, seen_timestamps
+from config import (DEDUP_SERVICE_ADDRESSES, DEDUP_SERVICE_BATCH_SIZE, DEDUP_SERVICE_PIPELINE_DEPTH,
+                    DEDUP_SERVICE_TIMEOUT, DEDUP_HOST_ID)
+
+# Operations that carry per-hash seen-at times
+TIMED_OPERATIONS = ('add', 'touch', 'check_and_add')
+
+def shard_for(job_hash: str, num_shards: int) -> int:
+    """Pick the shard that owns a hash from its leading hex digits."""
+    return int(job_hash[:8], 16) % num_shards
+
+class DedupRequestHandler(socketserver.StreamRequestHandler):
+    """Answer newline-delimited JSON requests on one connection, in order."""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = {'result': self.server.dispatch(json.loads(line))}
+            except Exception as e:
+                logger.error(f"Error handling dedup request: {e}")
+                response = {'error': str(e)}
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+class DedupServer(socketserver.ThreadingTCPServer):
+    """TCP front end for one dedup shard.
+
+    Each client connection gets a thread, and requests are applied to the backing
+    set under a single lock, so a check-and-add is atomic across every host.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: Tuple[str, int], backend: DedupBackend):
+        super().__init__(address, DedupRequestHandler)
+        self.backend = backend
+        self.lock = threading.Lock()
+
+    def dispatch(self, request: Dict):
+        op = request['op']
+        job_hashes = request.get('hashes', [])
+        seen_at = request.get('seen_at')
+        with self.lock:
+            if op == 'check_and_add':
+                return self.backend.check_and_add(job_hashes, seen_at).tolist()
+            if op == 'contains':
+                return self.backend.contains_many(job_hashes).tolist()
+            if op == 'add':
+                self.backend.add_many(job_hashes, seen_at)
+                return None
+            if op == 'remove':
+                self.backend.remove_many(job_hashes)
+                return None
+            if op == 'touch':
+                self.backend.touch_many(job_hashes, seen_at)
+                return None
+            if op == 'evict':
+                return self.backend.evict_older_than(request['cutoff'])
+            if op == 'len':
+                return len(self.backend)
+            if op == 'clear':
+                self.backend.clear()
+                return None
+            # Completion is tracked per host, so each host merges its own history when it first joins
+            if op == 'is_complete':
+                if 'host' in request:
+                    return self.backend.is_complete_for(request['host'])
+                return self.backend.is_complete
+            if op == 'mark_complete':
+                if 'host' in request:
+                    self.backend.mark_complete_for(request['host'], request.get('complete', True))
+                else:
+                    self.backend.mark_complete(request.get('complete', True))
+                return None
+        raise ValueError(f"Unknown dedup operation: {op}")
+
+def serve(host: str, port: int, index_file: Optional[Path] = None) -> None:
+    """Run a dedup shard until interrupted, in memory or persisted to ``index_file``."""
+    backend = HashIndex(index_file) if index_file else CompactHashSet()
+    with DedupServer((host, port), backend) as server:
+        logger.info(f"Dedup service listening on {host}:{port} ({index_file or 'in memory'})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("Dedup service stopped")
+        finally:
+            backend.close()
+
+class RemoteHashSet(DedupBackend):
+    """Job-hash set held by one or more dedup servers, sharded by hash prefix.
+
+    Batch operations are split per shard and sent as pipelined requests, so a
+    scrape's worth of hashes costs one round trip per shard rather than one per job.
+    """
+
+    def __init__(self, addresses: List[str] = DEDUP_SERVICE_ADDRESSES, batch_size: int = DEDUP_SERVICE_BATCH_SIZE,
+                 pipeline_depth: int = DEDUP_SERVICE_PIPELINE_DEPTH, timeout: float = DEDUP_SERVICE_TIMEOUT,
+                 host_id: str = DEDUP_HOST_ID):
+        self.addresses = addresses
+        self.host_id = host_id
+        self.batch_size = batch_size
+        self.pipeline_depth = pipeline_depth
+        self.connections = [self._connect(address, timeout) for address in addresses]
+        logger.info(f"Connected to dedup service: {', '.join(addresses)}")
+
+    @staticmethod
+    def _connect(address: str, timeout: float):
+        host, port = address.rsplit(':', 1)
+        sock = socket.create_connection((host, int(port)), timeout=timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock, sock.makefile('rb')
+
+    def _send(self, shard: int, request: Dict) -> None:
+        self.connections[shard][0].sendall(json.dumps(request).encode('utf-8') + b'\n')
+
+    def _receive(self, shard: int):
+        line = self.connections[shard][1].readline()
+        if not line:
+            raise ConnectionError(f"Dedup service {self.addresses[shard]} closed the connection")
+        response = json.loads(line)
+        if 'error' in response:
+            raise RuntimeError(f"Dedup service {self.addresses[shard]}: {response['error']}")
+        return response['result']
+
+    def _call_all(self, request: Dict) -> List:
+        """Send the same request to every shard and return their replies."""
+        for shard in range(len(self.connections)):
+            self._send(shard, request)
+        return [self._receive(shard) for shard in range(len(self.connections))]
+
+    def _pipeline(self, op: str, job_hashes: List[str], seen_at=None) -> List:
+        """Run a per-hash operation on the owning shards and return the results in input order.
+
+        Batches are sent to the shards round-robin, and each shard has at most
+        ``pipeline_depth`` unanswered requests so neither side blocks on a full socket.
+        """
+        seen = seen_timestamps(seen_at, len(job_hashes)).tolist() if op in TIMED_OPERATIONS else None
+        positions_by_shard = [[] for _ in self.connections]
+        for position, job_hash in enumerate(job_hashes):
+            positions_by_shard[shard_for(job_hash, len(self.connections))].append(position)
+        batches_by_shard = [
+            [(shard, positions[start:start + self.batch_size]) for start in range(0, len(positions), self.batch_size)]
+            for shard, positions in enumerate(positions_by_shard)
+        ]
+
+        results = [None] * len(job_hashes)
+        in_flight = [deque() for _ in self.connections]
+
+        def collect(shard: int) -> None:
+            batch = in_flight[shard].popleft()
+            reply = self._receive(shard)
+            if reply is not None:
+                for position, value in zip(batch, reply):
+                    results[position] = value
+
+        for round_batches in zip_longest(*batches_by_shard):
+            for shard, batch in filter(None, round_batches):
+                request = {'op': op, 'hashes': [job_hashes[position] for position in batch]}
+                if seen is not None:
+                    request['seen_at'] = [seen[position] for position in batch]
+                self._send(shard, request)
+                in_flight[shard].append(batch)
+                if len(in_flight[shard]) >= self.pipeline_depth:
+                    collect(shard)
+        for shard in range(len(self.connections)):
+            while in_flight[shard]:
+                collect(shard)
+        return results
+
+    def __len__(self) -> int:
+        return sum(self._call_all({'op': 'len'}))
+
+    def contains_many(self, job_hashes: List[str]) -> np.ndarray:
+        return np.array(self._pipeline('contains', job_hashes), dtype=bool)
+
+    def add_many(self, job_hashes: List[str], seen_at=None) -> None:
+        self._pipeline('add', job_hashes, seen_at)
+
+    def check_and_add(self, job_hashes: List[str], seen_at=None) -> np.ndarray:
+        """Atomically (per shard) add hashes, returning which were already present."""
+        return np.array(self._pipeline('check_and_add', job_hashes, seen_at), dtype=bool)
+
+    def remove_many(self, job_hashes: List[str]) -> None:
+        self._pipeline('remove', job_hashes)
+
+    def touch_many(self, job_hashes: List[str], seen_at=None) -> None:
+        self._pipeline('touch', job_hashes, seen_at)
+
+    def evict_older_than(self, cutoff: float) -> int:
+        return sum(self._call_all({'op': 'evict', 'cutoff': cutoff}))
+
+    @property
+    def is_complete(self) -> bool:
+        """Whether this host's job store has been merged into every shard."""
+        return all(self._call_all({'op': 'is_complete', 'host': self.host_id}))
+
+    def mark_complete(self, complete: bool = True) -> None:
+        self._call_all({'op': 'mark_complete', 'host': self.host_id, 'complete': complete})
+
+    def clear(self) -> None:
+        self._call_all({'op': 'clear'})
+        logger.info("Cleared dedup service")
+
+    def close(self) -> None:
+        for sock, reader in self.connections:
+            reader.close()
+            sock.close()
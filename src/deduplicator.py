@@ -1,89 +1,246 @@
 import pandas as pd
-from typing import List, Dict, Set, Union
+from typing import List, Dict, Iterator, Optional
+import time
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 import hashlib
-import json
 from utils import logger
-from storage import JobStorage
+from storage import JobStorage, DATE_COLLECTED_FORMAT
+from dedup_index import DedupBackend, HashIndex, CompactHashSet
+from dedup_service import RemoteHashSet
+from near_dedup import MinHashLSH, BatchLSH
+from config import (USE_PERSISTENT_DEDUP_INDEX, DEDUP_KEY_COLUMNS, DEDUP_HASH_WORKERS, NEAR_DEDUP_ENABLED,
+                    DEDUP_RETENTION_DAYS, DEDUP_BACKEND)
+
+def hash_keys(keys: List[str]) -> List[str]:
+    """MD5-hash a batch of composite job keys."""
+    md5 = hashlib.md5
+    return [md5(key.encode('utf-8')).hexdigest() for key in keys]
 
 class Deduplicator:
-    def __init__(self, storage: JobStorage):
+    def __init__(self, storage: JobStorage, use_index: bool = USE_PERSISTENT_DEDUP_INDEX,
+                 near_duplicates: bool = NEAR_DEDUP_ENABLED, retention_days: Optional[float] = DEDUP_RETENTION_DAYS,
+                 backend: str = DEDUP_BACKEND, load: bool = True):
+        # ``load=False`` skips the automatic load or rebuild, for callers that rebuild explicitly
         self.storage = storage
-        self.existing_hashes: Set[str] = set()
-        self.load_existing_hashes()
-    
-    def load_existing_hashes(self) -> None:
-        """Load existing job hashes from all output formats."""
-        try:
-            # Try loading from CSV first
-            df = self.storage.load_jobs('csv')
-            if not df.empty:
-                self._load_hashes_from_dataframe(df)
-            
-            # Also try loading from JSON
-            json_data = self.storage.load_jobs('json')
-            if json_data:
-                self._load_hashes_from_json(json_data)
-                
-            logger.info(f"Loaded {len(self.existing_hashes)} existing job hashes")
-            
-        except Exception as e:
-            logger.error(f"Error loading existing jobs: {e}")
+        self.retention_days = retention_days
+        self.near_index = MinHashLSH() if near_duplicates else None
+        # The shared service claims new jobs as it checks them, so two hosts cannot both keep one
+        self.claims_on_check = backend == 'service'
+        if backend == 'service':
+            # Shared with other hosts; each host merges its own store the first time it joins
+            self.existing_hashes: DedupBackend = RemoteHashSet()
+            if load and not self.existing_hashes.is_complete:
+                self.rebuild_index()
+        elif use_index:
+            self.existing_hashes = HashIndex()
+            if load and not self.existing_hashes.is_complete:
+                self.rebuild_index()
+        else:
+            self.existing_hashes = CompactHashSet()
+            if load:
+                self.load_existing_hashes()
+        if load and self.near_index is not None and not len(self.near_index) and self.storage.get_revision():
+            # Enabled after jobs were stored, or its file was removed; otherwise every old job looks new
+            self.rebuild_near_index()
+        self.evict_expired()
+    
+    def _window_start(self) -> Optional[float]:
+        """Return the epoch time before which keys fall outside the retention window, if one is set."""
+        if self.retention_days is None:
+            return None
+        return time.time() - self.retention_days * 86400
+    
+    def evict_expired(self) -> int:
+        """Drop keys not seen within the retention window."""
+        cutoff = self._window_start()
+        if cutoff is None:
+            return 0
+        evicted = self.existing_hashes.evict_older_than(cutoff)
+        if evicted:
+            logger.info(f"Evicted {evicted} dedup keys not seen in the last {self.retention_days} days")
+        return evicted
+    
+    def rebuild_index(self, hash_workers: int = DEDUP_HASH_WORKERS) -> None:
+        """Rebuild the persistent hash index from the canonical store.
+
+        The dedup service is shared, so this host's store is merged into it rather
+        than replacing what other hosts have added. The index is only marked
+        complete after a full pass; a failed read raises and leaves it incomplete,
+        so the next start rebuilds it.
+        """
+        if isinstance(self.existing_hashes, CompactHashSet):
+            logger.warning("Persistent dedup index is disabled; nothing to rebuild")
+            return
+        
+        if isinstance(self.existing_hashes, RemoteHashSet):
+            logger.info("Loading the job store into the dedup service")
+        else:
+            logger.info("Rebuilding persistent dedup index from the job store")
+            self.existing_hashes.clear()
+        self.existing_hashes.mark_complete(False)
+        self.load_existing_hashes(hash_workers)
+        self.existing_hashes.mark_complete()
+        
+        if self.near_index is not None:
+            self.rebuild_near_index()
+    
+    def rebuild_near_index(self) -> None:
+        """Rebuild the near-duplicate MinHash index from the canonical store."""
+        self.near_index.clear()
+        count = 0
+        for chunk in self.storage.iter_jobs('store', columns=DEDUP_KEY_COLUMNS + ['job_description']):
+            for job in chunk.to_dict('records'):
+                self.near_index.insert(self._job_hash(job), self.near_index.signature(job))
+                count += 1
+        logger.info(f"Indexed {count} jobs for near-duplicate detection")
+    
+    def load_existing_hashes(self, hash_workers: int = DEDUP_HASH_WORKERS) -> None:
+        """Load existing job hashes from the canonical store.
+
+        Read errors are raised rather than logged: a partly loaded set would let
+        already-stored jobs through as new.
+        """
+        # With a retention window only jobs collected inside it are loaded
+        cutoff = self._window_start()
+        since = datetime.fromtimestamp(cutoff).strftime(DATE_COLLECTED_FORMAT) if cutoff else None
+        chunks = self.storage.iter_jobs('store', columns=DEDUP_KEY_COLUMNS + ['date_collected'], since=since)
+        if hash_workers > 1:
+            self._load_hashes_in_parallel(chunks, hash_workers)
+        else:
+            for chunk in chunks:
+                self._load_hashes_from_dataframe(chunk)
+        
+        logger.info(f"Loaded {len(self.existing_hashes)} existing job hashes")
+    
+    def _load_hashes_in_parallel(self, chunks: Iterator[pd.DataFrame], workers: int) -> None:
+        """Hash chunks in worker processes, keeping at most two chunks per worker in flight."""
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk in chunks:
+                pending.append((executor.submit(hash_keys, self._composite_keys(chunk)), self._seen_at(chunk)))
+                if len(pending) >= workers * 2:
+                    future, seen_at = pending.popleft()
+                    self.existing_hashes.update(future.result(), seen_at)
+            while pending:
+                future, seen_at = pending.popleft()
+                self.existing_hashes.update(future.result(), seen_at)
+    
+    def _seen_at(self, df: pd.DataFrame) -> np.ndarray:
+        """Return each row's collection time in epoch seconds, using now where it is missing or unparseable."""
+        now = time.time()
+        if 'date_collected' not in df.columns:
+            return np.full(len(df), now)
+        collected = pd.to_datetime(df['date_collected'], errors='coerce', format=DATE_COLLECTED_FORMAT)
+        seconds = (collected - pd.Timestamp(0)) / pd.Timedelta(seconds=1)
+        return seconds.fillna(now).to_numpy(dtype=np.float64)
+    
+    def _composite_keys(self, df: pd.DataFrame) -> List[str]:
+        """Build the title_company_location_date_posted key for every row column-wise.
+
+        Missing columns and NaN values become empty strings, matching how freshly
+        parsed jobs are keyed.
+        """
+        keys = df.reindex(columns=DEDUP_KEY_COLUMNS).fillna('').astype(str)
+        composite = keys[DEDUP_KEY_COLUMNS[0]].str.cat([keys[column] for column in DEDUP_KEY_COLUMNS[1:]], sep='_')
+        return composite.tolist()
     
     def _load_hashes_from_dataframe(self, df: pd.DataFrame) -> None:
         """Load hashes from DataFrame."""
-        for _, row in df.iterrows():
-            job_hash = self._create_job_hash(
-                row.get('job_title', ''),
-                row.get('company', ''),
-                row.get('location', ''),
-                row.get('date_posted', '')
-            )
-            self.existing_hashes.add(job_hash)
+        self.existing_hashes.update(hash_keys(self._composite_keys(df)), self._seen_at(df))
     
     def _load_hashes_from_json(self, json_data: List[Dict]) -> None:
         """Load hashes from JSON data."""
-        for job in json_data:
-            job_hash = self._create_job_hash(
-                job.get('job_title', ''),
-                job.get('company', ''),
-                job.get('location', ''),
-                job.get('date_posted', '')
-            )
-            self.existing_hashes.add(job_hash)
+        self._load_hashes_from_dataframe(pd.DataFrame(json_data))
     
     def _create_job_hash(self, title: str, company: str, location: str, date_posted: str) -> str:
         """Create a unique hash for a job based on key identifiers."""
-        hash_string = f"{title}_{company}_{location}_{date_posted}"
-        return hashlib.md5(hash_string.encode('utf-8')).hexdigest()
+        values = ['' if pd.isna(value) else value for value in (title, company, location, date_posted)]
+        return hash_keys(['_'.join(str(value) for value in values)])[0]
     
-    def is_duplicate(self, job_data: Dict) -> bool:
-        """Check if a job is a duplicate."""
-        job_hash = self._create_job_hash(
+    def _job_hash(self, job_data: Dict) -> str:
+        return self._create_job_hash(
             job_data.get('job_title', ''),
             job_data.get('company', ''),
             job_data.get('location', ''),
             job_data.get('date_posted', '')
         )
-        return job_hash in self.existing_hashes
+    
+    def is_duplicate(self, job_data: Dict) -> bool:
+        """Check if a job is a duplicate."""
+        return self._job_hash(job_data) in self.existing_hashes
+    
+    def known_jobs(self, jobs: List[Dict]) -> List[bool]:
+        """Whether each job is already in the dedup index, checked in one call without recording them."""
+        if not jobs:
+            return []
+        return [bool(known) for known in self.existing_hashes.contains_many([self._job_hash(job) for job in jobs])]
     
     def add_job_hash(self, job_data: Dict) -> None:
         """Add a job hash to the existing hashes set."""
-        job_hash = self._create_job_hash(
-            job_data.get('job_title', ''),
-            job_data.get('company', ''),
-            job_data.get('location', ''),
-            job_data.get('date_posted', '')
-        )
-        self.existing_hashes.add(job_hash)
+        self.existing_hashes.add(self._job_hash(job_data))
     
     def filter_duplicates(self, jobs: List[Dict]) -> List[Dict]:
-        """Filter out duplicate jobs from a list."""
+        """Filter out duplicate jobs from a list, checking the whole batch in one call.
+
+        Locally nothing is recorded here: call ``record_jobs`` once the unique jobs
+        are saved. With the dedup service the batch is checked and added in one
+        atomic round trip, so hosts scraping the same job at once cannot both keep
+        it; ``release_jobs`` gives the claims back if the save then fails.
+        """
+        job_hashes = [self._job_hash(job) for job in jobs]
+        if not jobs:
+            known = []
+        elif self.claims_on_check:
+            known = self.existing_hashes.check_and_add(job_hashes)
+        else:
+            known = self.existing_hashes.contains_many(job_hashes)
+        
         unique_jobs = []
-        for job in jobs:
-            if not self.is_duplicate(job):
-                unique_jobs.append(job)
-                self.add_job_hash(job)
+        new_hashes = set()
+        batch_index = BatchLSH(self.near_index) if self.near_index is not None else None
+        for job, job_hash, is_known in zip(jobs, job_hashes, known):
+            if is_known or job_hash in new_hashes:
+                continue
+            if batch_index is not None and self._is_near_duplicate(job, batch_index):
+                continue
+            unique_jobs.append(job)
+            new_hashes.add(job_hash)
         
         logger.info(f"Filtered {len(jobs) - len(unique_jobs)} duplicates, {len(unique_jobs)} unique jobs remaining")
-        return unique_jobs
\ No newline at end of file
+        return unique_jobs
+    
+    def record_jobs(self, jobs: List[Dict]) -> None:
+        """Add the hashes of saved jobs to the dedup index in one call."""
+        if not jobs:
+            return
+        job_hashes = [self._job_hash(job) for job in jobs]
+        if not self.claims_on_check:
+            self.existing_hashes.add_many(job_hashes)
+        if self.near_index is not None:
+            for job, job_hash in zip(jobs, job_hashes):
+                self.near_index.insert(job_hash, self.near_index.signature(job))
+    
+    def release_jobs(self, jobs: List[Dict]) -> None:
+        """Give back the dedup service claims on jobs whose save failed, so a later run can keep them."""
+        if jobs and self.claims_on_check:
+            self.existing_hashes.remove_many([self._job_hash(job) for job in jobs])
+    
+    def _is_near_duplicate(self, job: Dict, batch_index: BatchLSH) -> bool:
+        """Check a job against the MinHash index and the unique jobs earlier in the batch.
+
+        Signatures are only written to the index by ``record_jobs``; until then they
+        are kept in ``batch_index`` so near-duplicates within one batch are still caught.
+        """
+        signature = self.near_index.signature(job)
+        match = self.near_index.query(signature)
+        if not match:
+            batch_match = batch_index.query(signature)
+            match = batch_match and ('an earlier job in this batch', batch_match[1])
+        if match:
+            logger.debug(f"Near-duplicate of {match[0]} ({match[1]:.2f}): {job.get('source_url', '')}")
+            return True
+        batch_index.insert(signature)
+        return False
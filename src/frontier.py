@@ -0,0 +1,165 @@
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils import logger
+from config import (FRONTIER_FILE, FRONTIER_MAX_ATTEMPTS, FRONTIER_RETRY_BACKOFF_MINUTES,
+                    FRONTIER_FAILED_COOLDOWN_HOURS, STORE_BUSY_TIMEOUT)
+
+PENDING = 'pending'
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+FAILED = 'failed'
+
+class CrawlFrontier:
+    """Persistent queue of job URLs to scrape, with each URL's state and result.
+
+    URLs move from pending to in_flight when claimed, then to done (with the parsed
+    job) or failed. Failed URLs are retried in later runs after an exponential
+    backoff, up to ``max_attempts``; URLs that used them all are forgotten after
+    ``failed_cooldown_hours`` so a later crawl can queue them again. Done results are only cleared once the store
+    write has succeeded, so a crash or a failed save loses at most the page in
+    flight; the kept results are saved by the next run.
+    """
+
+    def __init__(self, frontier_file: Path = FRONTIER_FILE, max_attempts: int = FRONTIER_MAX_ATTEMPTS,
+                 retry_backoff_minutes: float = FRONTIER_RETRY_BACKOFF_MINUTES,
+                 failed_cooldown_hours: float = FRONTIER_FAILED_COOLDOWN_HOURS):
+        self.frontier_file = frontier_file
+        self.max_attempts = max_attempts
+        self.retry_backoff_minutes = retry_backoff_minutes
+        self.failed_cooldown_hours = failed_cooldown_hours
+        self.conn = sqlite3.connect(frontier_file, timeout=STORE_BUSY_TIMEOUT, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS frontier ("
+                "url TEXT PRIMARY KEY, source TEXT, state TEXT, attempts INTEGER DEFAULT 0, "
+                "next_attempt_at REAL DEFAULT 0, last_error TEXT, result TEXT, updated_at REAL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_frontier_state ON frontier (state, next_attempt_at)")
+
+    def recover(self) -> int:
+        """Return URLs left in flight by a crashed run to the pending state."""
+        with self.conn:
+            recovered = self.conn.execute(
+                "UPDATE frontier SET state = ?, updated_at = ? WHERE state = ?", (PENDING, time.time(), IN_FLIGHT)
+            ).rowcount
+        if recovered:
+            logger.info(f"Recovered {recovered} URLs left in flight by an interrupted run")
+        return recovered
+
+    def discard_pending(self) -> int:
+        """Drop pending URLs from an earlier run; done results and retry schedules are kept."""
+        with self.conn:
+            return self.conn.execute("DELETE FROM frontier WHERE state = ?", (PENDING,)).rowcount
+
+    def expire_failed(self) -> int:
+        """Drop URLs that used up their attempts and have not been tried for ``failed_cooldown_hours``."""
+        cutoff = time.time() - self.failed_cooldown_hours * 3600
+        with self.conn:
+            expired = self.conn.execute(
+                "DELETE FROM frontier WHERE state = ? AND attempts >= ? AND updated_at < ?",
+                (FAILED, self.max_attempts, cutoff)
+            ).rowcount
+        if expired:
+            logger.info(f"Expired {expired} failed URLs older than {self.failed_cooldown_hours} hours")
+        return expired
+
+    def add(self, job_sources: Dict[str, str], partial_jobs: Optional[Dict[str, Dict]] = None) -> int:
+        """Queue job URLs (mapped to the source they came from) that are not already in the frontier.
+
+        ``partial_jobs`` maps URLs to the fields already known for them, such as a
+        search result card's; the scraped job's empty fields are filled from it.
+        """
+        partial_jobs = partial_jobs or {}
+        now = time.time()
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO frontier (url, source, state, result, updated_at) VALUES (?, ?, ?, ?, ?)",
+                ((url, source, PENDING, json.dumps(partial_jobs[url], default=str) if url in partial_jobs else None,
+                  now) for url, source in job_sources.items())
+            )
+            return self.conn.total_changes - before
+
+    def add_done(self, jobs: Dict[str, Tuple[str, Dict]]) -> int:
+        """Record jobs obtained without fetching their page, mapped by URL to (source, job), as done."""
+        now = time.time()
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO frontier (url, source, state, result, updated_at) VALUES (?, ?, ?, ?, ?)",
+                ((url, source, DONE, json.dumps(job, default=str), now) for url, (source, job) in jobs.items())
+            )
+            return self.conn.total_changes - before
+
+    def claim(self) -> Optional[str]:
+        """Atomically take the next pending URL, or failed URL due for a retry, and mark it in flight."""
+        now = time.time()
+        with self.conn:
+            row = self.conn.execute(
+                "UPDATE frontier SET state = ?, attempts = attempts + 1, updated_at = ? WHERE url = ("
+                "SELECT url FROM frontier WHERE state = ? "
+                "OR (state = ? AND attempts < ? AND next_attempt_at <= ?) ORDER BY state != ?, rowid LIMIT 1"
+                ") RETURNING url",
+                (IN_FLIGHT, now, PENDING, FAILED, self.max_attempts, now, PENDING)
+            ).fetchone()
+        return row[0] if row else None
+
+    def complete(self, url: str, job: Dict) -> None:
+        """Record a scraped job for a URL, filling its empty fields from any partial job queued with it."""
+        with self.conn:
+            row = self.conn.execute("SELECT result FROM frontier WHERE url = ?", (url,)).fetchone()
+            if row and row[0]:
+                partial = json.loads(row[0])
+                job = {**job, **{field: value for field, value in partial.items() if value and not job.get(field)}}
+            self.conn.execute(
+                "UPDATE frontier SET state = ?, result = ?, last_error = NULL, updated_at = ? WHERE url = ?",
+                (DONE, json.dumps(job, default=str), time.time(), url)
+            )
+
+    def fail(self, url: str, error: str = '') -> None:
+        """Record a failed attempt and schedule the next retry with exponential backoff."""
+        now = time.time()
+        with self.conn:
+            attempts = self.conn.execute("SELECT attempts FROM frontier WHERE url = ?", (url,)).fetchone()[0]
+            retry_at = now + self.retry_backoff_minutes * 60 * 2 ** (attempts - 1)
+            self.conn.execute(
+                "UPDATE frontier SET state = ?, next_attempt_at = ?, last_error = ?, updated_at = ? WHERE url = ?",
+                (FAILED, retry_at, error, now, url)
+            )
+        if attempts >= self.max_attempts:
+            logger.warning(f"Giving up on {url} after {attempts} attempts")
+
+    def results(self) -> List[Tuple[str, Dict]]:
+        """Return (source, job) for every scraped URL whose job has not been saved yet."""
+        rows = self.conn.execute("SELECT source, result FROM frontier WHERE state = ? ORDER BY rowid", (DONE,))
+        return [(source, json.loads(result)) for source, result in rows]
+
+    def fetched_urls(self) -> List[str]:
+        """Return scraped URLs whose page was fetched, leaving out jobs recorded from search cards."""
+        rows = self.conn.execute("SELECT url FROM frontier WHERE state = ? AND attempts > 0 ORDER BY rowid", (DONE,))
+        return [url for url, in rows]
+
+    def failed_since(self, timestamp: float) -> List[str]:
+        """Return URLs whose latest attempt, made at or after ``timestamp``, failed."""
+        rows = self.conn.execute("SELECT url FROM frontier WHERE state = ? AND updated_at >= ?", (FAILED, timestamp))
+        return [url for url, in rows]
+
+    def clear_done(self) -> int:
+        """Forget scraped URLs once their jobs are saved."""
+        with self.conn:
+            return self.conn.execute("DELETE FROM frontier WHERE state = ?", (DONE,)).rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of URLs in each state."""
+        counts = {PENDING: 0, IN_FLIGHT: 0, DONE: 0, FAILED: 0}
+        counts.update(self.conn.execute("SELECT state, COUNT(*) FROM frontier GROUP BY state").fetchall())
+        return counts
+
+    def close(self) -> None:
+        self.conn.close()
@@ -1,80 +1,264 @@
 import argparse
-from typing import List
-from datetime import datetime
+from typing import List, Dict, Iterable, Optional, Callable, Tuple, TYPE_CHECKING
+from collections import Counter
+from itertools import chain
+from functools import partial
+from pathlib import Path
 import sys
 import time
-import asyncio
-from config import INPUT_URLS_FILE, OUTPUT_FORMATS
-from utils import read_input_file, logger
-from scraper import JobScraper
-from deduplicator import Deduplicator
-from storage import JobStorage
-from scheduler import ScrapingScheduler
+from config import (INPUT_URLS_FILE, OUTPUT_FORMATS, DEDUP_HASH_WORKERS,
+                    SCHEDULE_DELAY_AFTER_FINISH_MINUTES, SCRAPER_WORKERS, METRICS_ENABLED, METRICS_PORT,
+                    SEARCH_PAGE_DELAY, INPUT_BATCH_SIZE, EXTRACT_SEARCH_CARDS, SEARCH_CARD_REQUIRED_FIELDS,
+                    EXPORT_AFTER_SCHEDULED_RUN, ensure_directories)
+from utils import (read_input_sources, iter_input_sources, batched, is_search_url, paginate_search_url,
+                   detect_job_board, logger)
+from frontier import PENDING
+from metrics import STAGE_SECONDS, JOBS, start_metrics_server
+from report import RUN_REPORT
+from profiling import PROFILER, PROFILE_MODES
 
-def run_scraping():
-    """Main scraping function that can be called directly or scheduled."""
-    try:
-        # Read input URLs
-        urls = read_input_file(INPUT_URLS_FILE)
-        if not urls:
-            logger.error("No URLs found to scrape")
-            return False
-        
-        # Initialize components
-        scraper = JobScraper(use_selenium=False, use_playwright=True)
-        storage = JobStorage(OUTPUT_FORMATS)
-        deduplicator = Deduplicator(storage)
+# Modules that pull in Playwright, Selenium, pandas, numpy or APScheduler are imported by the
+# code paths that use them, so --help and light commands start quickly (see check_startup.py)
+if TYPE_CHECKING:
+    from scraper import JobScraper
+    from runtime import ScraperRuntime
+    from frontier import CrawlFrontier
+    from deduplicator import Deduplicator
+
+def discover_job_urls(scraper: 'JobScraper', sources: List[Dict],
+                      extract_cards: bool = EXTRACT_SEARCH_CARDS) -> Tuple[Dict[str, str], Dict[str, Dict]]:
+    """Map each job URL to the input source it was found through.
+
+    Search pages are expanded into job URLs, following up to each source's
+    ``max_pages`` result pages; other sources are job pages themselves. With
+    ``extract_cards``, each search result card is also parsed into a partial job;
+    these are returned second, by job URL.
+    """
+    job_sources = {}
+    card_jobs = {}
+    for source in sources:
+        url = source['url']
+        if not is_search_url(url):
+            job_sources.setdefault(url, url)
+            continue
         
-        all_job_urls = []
+        for page in range(source.get('max_pages', 1)):
+            page_url = paginate_search_url(url, page)
+            if page_url is None:
+                break
+            with STAGE_SECONDS.time(stage='discovery', board=detect_job_board(page_url)):
+                if extract_cards:
+                    # Falls back to the page's job links itself, so each page is fetched at most twice
+                    jobs_from_search, job_urls_from_search = scraper.extract_jobs_from_search(page_url)
+                    job_urls_from_search = [job['source_url'] for job in jobs_from_search] or job_urls_from_search
+                else:
+                    jobs_from_search = []
+                    job_urls_from_search = scraper.loop.run_until_complete(
+                        scraper.extract_job_urls_from_search(page_url)
+                    )
+            new_urls = [job_url for job_url in job_urls_from_search if job_url not in job_sources]
+            for job_url in new_urls:
+                job_sources[job_url] = url
+            for job in jobs_from_search:
+                card_jobs.setdefault(job['source_url'], job)
+            logger.info(f"Found {len(job_urls_from_search)} jobs from {page_url}")
+            RUN_REPORT.sleep(SEARCH_PAGE_DELAY)  # Delay between search requests
+            if not new_urls:
+                break
+    
+    return job_sources, card_jobs
+
+def queue_job_urls(frontier: 'CrawlFrontier', deduplicator: 'Deduplicator', job_sources: Dict[str, str],
+                   job_urls: List[str], card_jobs: Dict[str, Dict]) -> List[str]:
+    """Queue job URLs in the frontier, fetching job pages only where search cards fall short.
+
+    Card jobs already in the dedup index are dropped. New cards with every
+    ``SEARCH_CARD_REQUIRED_FIELDS`` are recorded as scraped; other URLs are queued
+    for a page fetch, with their card's fields filling the gaps the page leaves.
+    Returns the URLs recorded from cards.
+    """
+    cards = {url: card_jobs[url] for url in job_urls if url in card_jobs}
+    known = {url for url, is_known in zip(cards, deduplicator.known_jobs(list(cards.values()))) if is_known}
+    complete = {url: job for url, job in cards.items()
+                if url not in known and all(job.get(field) for field in SEARCH_CARD_REQUIRED_FIELDS)}
+    fetch_urls = [url for url in job_urls if url not in known and url not in complete]
+    count_urls(list(known), 'skipped')
+    count_urls(list(complete), 'from_card')
+    frontier.add({url: job_sources[url] for url in fetch_urls},
+                 {url: cards[url] for url in fetch_urls if url in cards})
+    frontier.add_done({url: (job_sources[url], job) for url, job in complete.items()})
+    return list(complete)
+
+def count_urls(urls: List[str], outcome: str) -> None:
+    """Add URLs to the per-board counts in the run report."""
+    for board, count in Counter(detect_job_board(url) for url in urls).items():
+        RUN_REPORT.count_urls(board, outcome, count)
+
+def count_jobs(jobs: List[Dict], outcome: str) -> None:
+    """Add jobs to the per-board job counter."""
+    for board, count in Counter(detect_job_board(job.get('source_url', '')) for job in jobs).items():
+        JOBS.inc(count, board=board, outcome=outcome)
+
+def run_scraping(sources: Optional[Iterable[Dict]] = None,
+                 on_source_result: Optional[Callable[[str, int], None]] = None,
+                 resume: bool = False, workers: int = SCRAPER_WORKERS,
+                 runtime: Optional['ScraperRuntime'] = None, profile: Optional[str] = None):
+    """Main scraping function that can be called directly or scheduled.
+
+    ``sources`` may be any iterable and is consumed in batches; it defaults to
+    streaming the input file. ``on_source_result`` is called with each source URL
+    and the number of new jobs it produced. With ``resume``, discovery is skipped
+    and the URLs an interrupted run left in the crawl frontier are scraped instead.
+    With more than one ``workers``, job pages are scraped by that many processes,
+    each with its own browser. A ``runtime`` keeps the scraper, browser and
+    indexes warm across calls; without one they are created for this run and
+    shut down afterwards. A JSON performance report of the run is written to the
+    run reports directory. With a ``profile`` mode ('cprofile' or 'sample'), a
+    CPU profile and per-stage allocation report are written to the profiles
+    directory.
+    """
+    from runtime import ScraperRuntime
+    from workers import run_workers
+
+    owns_runtime = runtime is None
+    status = 'failed'
+    RUN_REPORT.reset()
+    if profile:
+        PROFILER.start(profile)
+    try:
+        # Read input sources
+        if not resume:
+            if sources is None:
+                sources = iter_input_sources(INPUT_URLS_FILE)
+            input_sources = iter(sources)
+            first_source = next(input_sources, None)
+            if first_source is None:
+                logger.error("No URLs found to scrape")
+                status = 'no_urls'
+                return False
+            input_sources = chain([first_source], input_sources)
         
-        # Separate search URLs from job URLs
-        search_urls = [url for url in urls if 'search' in url or 'results' in url]
-        job_urls = [url for url in urls if url not in search_urls]
+        # Initialize components, or reuse the warm ones
+        runtime = runtime or ScraperRuntime()
+        with PROFILER.stage('setup'):
+            runtime.prepare()
+        scraper = runtime.scraper
+        storage = runtime.storage
+        deduplicator = runtime.deduplicator
+        seen_urls = runtime.seen_urls
+        frontier = runtime.frontier
+        frontier.recover()
+        card_urls = set()
         
-        # Extract job URLs from search pages
-        if search_urls:
-            logger.info(f"Extracting job URLs from {len(search_urls)} search pages")
-            loop = asyncio.get_event_loop()
-            for search_url in search_urls:
-                job_urls_from_search = loop.run_until_complete(
-                    scraper.extract_job_urls_from_search(search_url)
-                )
-                all_job_urls.extend(job_urls_from_search)
-                logger.info(f"Found {len(job_urls_from_search)} jobs from {search_url}")
-                time.sleep(5)  # Delay between search requests
+        if resume:
+            logger.info(f"Resuming interrupted crawl: {frontier.counts()[PENDING]} URLs pending")
+        else:
+            # A new crawl replaces leftover pending URLs and long-failed ones; unsaved results and retries carry over
+            frontier.discard_pending()
+            frontier.expire_failed()
+            discovered = 0
+            with PROFILER.stage('discovery'):
+                # Queue job URLs batch by batch, so memory stays flat however long the input is
+                for batch in batched(input_sources, INPUT_BATCH_SIZE):
+                    job_sources, card_jobs = discover_job_urls(scraper, batch)
+
+                    # Skip job pages already fetched within the revisit TTL
+                    job_urls = seen_urls.filter_unseen(list(job_sources)) if seen_urls else list(job_sources)
+                    count_urls(list(job_sources), 'discovered')
+                    count_urls(list(set(job_sources) - set(job_urls)), 'skipped')
+                    card_urls.update(queue_job_urls(frontier, deduplicator, job_sources, job_urls, card_jobs))
+                    discovered += len(job_sources)
+            if not discovered:
+                logger.error("No job URLs found to scrape")
+                status = 'no_urls'
+                return False
         
-        all_job_urls.extend(job_urls)
+        # Scrape job pages from the frontier, recording each result as soon as it is parsed
+        def record_result(url: str, job: Optional[Dict]) -> None:
+            if job:
+                frontier.complete(url, job)
+            else:
+                frontier.fail(url, 'scrape failed')
         
-        if not all_job_urls:
-            logger.error("No job URLs found to scrape")
-            return False
-            
-        # Scrape individual job pages
-        logger.info(f"Starting to scrape {len(all_job_urls)} job URLs")
-        jobs = scraper.scrape_multiple_urls(all_job_urls)
-        # Scrape jobs
-        logger.info(f"Starting to scrape {len(urls)} URLs")
-        jobs = scraper.scrape_multiple_urls(urls)
+        if card_urls:
+            logger.info(f"Recorded {len(card_urls)} jobs from search result cards without fetching their pages")
+        logger.info(f"Starting to scrape {frontier.counts()[PENDING]} job URLs")
+        scrape_start = time.time()
+        with PROFILER.stage('scrape'):
+            if workers > 1:
+                if any(run_workers(workers)):
+                    # URLs a crashed worker held are left for --resume
+                    frontier.recover()
+            else:
+                scraper.scrape_multiple_urls(iter(frontier.claim, None), on_result=record_result)
+        results = frontier.results()
+        jobs = [job for _, job in results]
+        # Card-only jobs were never fetched, so they neither count as fetched nor start the revisit TTL
+        fetched_urls = frontier.fetched_urls()
+        count_urls(fetched_urls, 'fetched')
+        count_urls(frontier.failed_since(scrape_start), 'failed')
+        if seen_urls:
+            seen_urls.mark_fetched(fetched_urls)
         
-        # Filter duplicates
-        unique_jobs = deduplicator.filter_duplicates(jobs)
+        # Filter duplicates; the hashes are only recorded once the jobs are saved
+        with STAGE_SECONDS.time(stage='dedup', board='all'), PROFILER.stage('dedup'):
+            unique_jobs = deduplicator.filter_duplicates(jobs)
+        RUN_REPORT.record_dedup(len(jobs), len(unique_jobs))
+        count_jobs(jobs, 'scraped')
+        count_jobs(unique_jobs, 'new')
         
-        # Save results to all formats
+        # Save results to the canonical store; exports are generated by the export command
         if unique_jobs:
-            storage.save_jobs(unique_jobs)
+            start = time.perf_counter()
+            with PROFILER.stage('storage'):
+                try:
+                    storage.save_jobs(unique_jobs)
+                except Exception:
+                    deduplicator.release_jobs(unique_jobs)
+                    raise
+            RUN_REPORT.record_storage(time.perf_counter() - start)
+            deduplicator.record_jobs(unique_jobs)
             logger.info(f"Successfully processed {len(unique_jobs)} new jobs")
         else:
             logger.info("No new jobs found")
+        # Only reached after a successful save; a failed one raises and leaves the results for the next run
+        frontier.clear_done()
         
-        # Clean up
-        scraper.close()
+        if on_source_result:
+            job_sources = {job['source_url']: source for source, job in results}
+            new_counts = Counter(job_sources.get(job['source_url']) for job in unique_jobs)
+            # The scheduler passes its sources as a list, so they can be iterated again here
+            for source in sources or []:
+                on_source_result(source['url'], new_counts[source['url']])
+        status = 'succeeded'
         
     except Exception as e:
         logger.error(f"Error in main scraping function: {e}")
         return False
     
+    finally:
+        # Clean up
+        if owns_runtime and runtime:
+            runtime.close()
+        RUN_REPORT.write(status)
+        PROFILER.stop()
+    
     return True
 
+def scrape_and_export(export_formats: Optional[List[str]] = None, **kwargs) -> bool:
+    """Run ``run_scraping``, then regenerate the exports the run made stale.
+
+    Used for scheduled runs, so the output files stay current without a separate
+    ``export`` job. ``export_formats`` defaults to ``OUTPUT_FORMATS`` when
+    ``EXPORT_AFTER_SCHEDULED_RUN`` is set; otherwise nothing is exported.
+    """
+    success = run_scraping(**kwargs)
+    export_formats = export_formats or (OUTPUT_FORMATS if EXPORT_AFTER_SCHEDULED_RUN else None)
+    if export_formats:
+        from storage import JobStorage
+        JobStorage(export_formats).export(export_formats)
+    return success
+
 def main():
     """Main entry point for the scraper."""
     parser = argparse.ArgumentParser(description='Job Board Scraper')
@@ -82,33 +266,105 @@ def main():
                        help='Run scraping once and exit')
     parser.add_argument('--schedule', action='store_true',
                        help='Run scraping on a schedule')
+    parser.add_argument('--daemon', action='store_true',
+                       help='Run on a schedule, keeping the browser, storage and dedup index warm between runs')
     parser.add_argument('--interval', type=int, default=2,
                        help='Scraping interval in hours (default: 2)')
-    parser.add_argument('--formats', nargs='+', choices=['csv', 'json', 'excel'], default=OUTPUT_FORMATS,
-                       help='Output formats (default: csv json excel)')
+    parser.add_argument('--resume', action='store_true',
+                       help='Continue an interrupted run from the crawl frontier instead of starting over')
+    parser.add_argument('--workers', type=int, default=SCRAPER_WORKERS,
+                       help=f'Scraper processes, each with its own browser (default: {SCRAPER_WORKERS})')
+    parser.add_argument('--metrics-port', type=int, default=METRICS_PORT,
+                       help=f'Port for the Prometheus metrics endpoint in schedule mode; 0 disables it '
+                            f'(default: {METRICS_PORT})')
+    parser.add_argument('--delay-after-finish', type=float, default=SCHEDULE_DELAY_AFTER_FINISH_MINUTES,
+                       metavar='MINUTES',
+                       help='Start each scheduled run this many minutes after the previous one finishes, '
+                            'instead of on a fixed interval')
+    parser.add_argument('--input', nargs='+', default=None, metavar='PATH',
+                       help='Input files or glob patterns of CSV, TXT or Excel URL lists '
+                            '(default: data/input_urls.csv)')
+    parser.add_argument('--profile', nargs='?', const='cprofile', choices=PROFILE_MODES, default=None,
+                       help="Profile each run with cProfile (default) or a low-overhead stack sampler ('sample'), "
+                            "tracing allocations per stage; reports are written to logs/profiles")
+    
+    subparsers = parser.add_subparsers(dest='command')
+    export_parser = subparsers.add_parser('export',
+                                          help='Regenerate output files from the job store if it has changed')
+    export_parser.add_argument('--formats', nargs='+', choices=['csv', 'json', 'jsonl', 'excel'], default=None,
+                               help='Formats to export (default: configured output formats)')
+    export_parser.add_argument('--force', action='store_true',
+                               help='Regenerate exports even if they are up to date')
+    
+    rebuild_parser = subparsers.add_parser('rebuild-index',
+                                           help='Rebuild the persistent dedup index from the job store')
+    rebuild_parser.add_argument('--hash-workers', type=int, default=DEDUP_HASH_WORKERS,
+                                help=f'Processes used to hash the job history (default: {DEDUP_HASH_WORKERS})')
+    
+    serve_parser = subparsers.add_parser('serve-dedup',
+                                         help='Run a dedup service shard shared by scrapers on several hosts')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    serve_parser.add_argument('--port', type=int, default=8765, help='Port to listen on (default: 8765)')
+    serve_parser.add_argument('--index-file', type=Path, default=None,
+                              help='Persist the shard to this SQLite file instead of keeping it in memory')
     
     args = parser.parse_args()
+    ensure_directories()
     
-    if not args.once and not args.schedule:
+    if args.command == 'export':
+        from storage import JobStorage
+        storage = JobStorage(OUTPUT_FORMATS)
+        storage.export(args.formats, force=args.force)
+        sys.exit(0)
+    
+    if args.command == 'rebuild-index':
+        from storage import JobStorage
+        from deduplicator import Deduplicator
+        deduplicator = Deduplicator(JobStorage(OUTPUT_FORMATS), load=False)
+        deduplicator.rebuild_index(args.hash_workers)
+        sys.exit(0)
+    
+    if args.command == 'serve-dedup':
+        from dedup_service import serve as serve_dedup
+        serve_dedup(args.host, args.port, args.index_file)
+        sys.exit(0)
+    
+    if not args.once and not args.schedule and not args.daemon and not args.resume:
         parser.print_help()
         sys.exit(1)
     
-    # Update output formats if specified
-    if args.formats != OUTPUT_FORMATS:
-        
-        OUTPUT_FORMATS.clear()
-        OUTPUT_FORMATS.extend(args.formats)
-    
     try:
-        if args.once:
-            logger.info("Running scraper once")
-            success = run_scraping()
+        if args.once or args.resume:
+            logger.info("Resuming interrupted scraping run" if args.resume else "Running scraper once")
+            input_sources = iter_input_sources(args.input) if args.input else None
+            success = run_scraping(sources=input_sources, resume=args.resume, workers=args.workers,
+                                   profile=args.profile)
             sys.exit(0 if success else 1)
         
-        elif args.schedule:
+        elif args.schedule or args.daemon:
+            from runtime import ScraperRuntime
+            from scheduler import ScrapingScheduler
             logger.info(f"Starting scraper on {args.interval}-hour schedule")
-            scheduler = ScrapingScheduler(run_scraping, args.interval)
-            scheduler.start()
+            if METRICS_ENABLED and args.metrics_port:
+                start_metrics_server(port=args.metrics_port)
+            
+            # In daemon mode one runtime is shared by every run, so runs start with a warm browser and index
+            runtime = ScraperRuntime() if args.daemon else None
+            if runtime:
+                runtime.prepare()
+            scheduler = ScrapingScheduler(
+                partial(scrape_and_export, workers=args.workers, runtime=runtime, profile=args.profile),
+                args.interval,
+                read_input_sources(args.input or INPUT_URLS_FILE),
+                delay_after_finish=args.delay_after_finish
+            )
+            try:
+                scheduler.start()
+            finally:
+                from user_agents import USER_AGENT_POOL
+                USER_AGENT_POOL.close()
+                if runtime:
+                    runtime.close()
             
     except KeyboardInterrupt:
         logger.info("Scraper stopped by user")
@@ -0,0 +1,218 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from utils import logger
+from config import METRICS_HOST, METRICS_PORT
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+def _format_labels(labelnames: Sequence[str], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Metric:
+    """Base for labelled metrics kept in a registry and rendered in Prometheus text format."""
+
+    type = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        with self.lock:
+            lines.extend(self._samples())
+        return lines
+
+    def drain(self) -> Dict[Tuple[str, ...], object]:
+        """Return the values recorded since the last drain and start them afresh."""
+        with self.lock:
+            values, self.values = self.values, {}
+        return values
+
+    def merge(self, values: Dict[Tuple[str, ...], object]) -> None:
+        """Add values drained from the same metric in another process."""
+        raise NotImplementedError
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    type = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def merge(self, values: Dict[Tuple[str, ...], float]) -> None:
+        with self.lock:
+            for key, value in values.items():
+                self.values[key] = self.values.get(key, 0) + value
+
+    def _samples(self) -> List[str]:
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+                for key, value in sorted(self.values.items())]
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    type = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+    def merge(self, values: Dict[Tuple[str, ...], float]) -> None:
+        # The latest value wins, as if the other process had set it here
+        with self.lock:
+            self.values.update(values)
+
+    def _samples(self) -> List[str]:
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+                for key, value in sorted(self.values.items())]
+
+class Histogram(Metric):
+    """Distribution of observed values (seconds, by default) in cumulative buckets."""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry=None):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (last is +Inf), total count, sum]
+        self.values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self.lock:
+            state = self.values.setdefault(key, [[0] * (len(self.buckets) + 1), 0, 0.0])
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += 1
+            state[2] += value
+
+    def merge(self, values: Dict[Tuple[str, ...], list]) -> None:
+        with self.lock:
+            for key, (bucket_counts, count, total) in values.items():
+                state = self.values.setdefault(key, [[0] * (len(self.buckets) + 1), 0, 0.0])
+                state[0] = [a + b for a, b in zip(state[0], bucket_counts)]
+                state[1] += count
+                state[2] += total
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe how long the block takes, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, (bucket_counts, count, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), bucket_counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {count}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}')
+        return lines
+
+class MetricsRegistry:
+    """Collection of metrics rendered together for the exposition endpoint."""
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> None:
+        self.metrics.append(metric)
+
+    def drain(self) -> Dict[str, Dict]:
+        """Return every metric's values recorded since the last drain, by metric name, and start them afresh."""
+        snapshot = {}
+        for metric in self.metrics:
+            values = metric.drain()
+            if values:
+                snapshot[metric.name] = values
+        return snapshot
+
+    def merge(self, snapshot: Dict[str, Dict]) -> None:
+        """Add metric values drained from another process's registry, so this one's endpoint covers both."""
+        metrics = {metric.name: metric for metric in self.metrics}
+        for name, values in snapshot.items():
+            metrics[name].merge(values)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = MetricsRegistry()
+
+# Pipeline metrics; board is '' for URLs on unknown boards and 'all' for whole-batch stages
+STAGE_SECONDS = Histogram('scraper_stage_seconds', 'Time spent in each pipeline stage', ['stage', 'board'])
+FETCH_SECONDS = Histogram('scraper_fetch_seconds', 'Time spent fetching a page with each tier', ['tier', 'board'])
+FETCHES = Counter('scraper_fetches_total', 'Page fetches by tier and outcome', ['tier', 'board', 'outcome'])
+JOBS = Counter('scraper_jobs_total', 'Jobs scraped and found new (not duplicates), by board', ['board', 'outcome'])
+STORAGE_SECONDS = Histogram('scraper_storage_seconds', 'Time spent writing each storage format', ['format'])
+RUN_SECONDS = Histogram('scraper_run_seconds', 'Duration of scraping runs')
+RUNS = Counter('scraper_runs_total', 'Scraping runs by status', ['status'])
+RUN_LAG_SECONDS = Gauge('scraper_run_lag_seconds', 'How late the last scheduled run started')
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would otherwise flood stderr
+        pass
+
+def start_metrics_server(host: str = METRICS_HOST, port: int = METRICS_PORT) -> ThreadingHTTPServer:
+    """Serve /metrics in a background thread and return the server."""
+    server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,170 @@
+import re
+import sqlite3
+import hashlib
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils import logger
+from config import (NEAR_DEDUP_INDEX_FILE, NEAR_DEDUP_THRESHOLD, NEAR_DEDUP_NUM_PERM,
+                    NEAR_DEDUP_SHINGLE_SIZE, STORE_BUSY_TIMEOUT)
+
+MERSENNE_PRIME = (1 << 31) - 1
+MAX_HASH = np.uint64(MERSENNE_PRIME)
+
+def choose_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """Pick (bands, rows) with bands * rows == num_perm for a similarity threshold.
+
+    Two signatures become candidates when any band matches; the similarity at which
+    that is 50% likely is roughly (1 / bands) ** (1 / rows). The highest such point
+    at or below ``threshold`` is chosen, so true matches are rarely missed and the
+    extra candidates are filtered by comparing full signatures.
+    """
+    options = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    below = [option for option in options if (1 / option[0]) ** (1 / option[1]) <= threshold]
+    return max(below or options, key=lambda option: (1 / option[0]) ** (1 / option[1]))
+
+class MinHashLSH:
+    """Persistent MinHash/LSH index for finding near-duplicate job postings.
+
+    Each job is reduced to a MinHash signature over word shingles of its normalized
+    title, company and description. Signatures are split into bands, and only jobs
+    sharing a band bucket are compared, so lookups stay sublinear in the number of
+    indexed postings.
+    """
+
+    def __init__(self, index_file: Path = NEAR_DEDUP_INDEX_FILE, threshold: float = NEAR_DEDUP_THRESHOLD,
+                 num_perm: int = NEAR_DEDUP_NUM_PERM, shingle_size: int = NEAR_DEDUP_SHINGLE_SIZE):
+        self.index_file = index_file
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = choose_bands(threshold, num_perm)
+
+        # Fixed seed: permutations must be identical across runs for stored signatures to compare
+        rng = np.random.default_rng(1)
+        self._a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+        self.conn = sqlite3.connect(index_file, timeout=STORE_BUSY_TIMEOUT, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS signatures (id INTEGER PRIMARY KEY, job_key TEXT, signature BLOB)"
+            )
+            self.conn.execute("CREATE TABLE IF NOT EXISTS buckets (bucket INTEGER, doc_id INTEGER)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_buckets ON buckets (bucket)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS index_meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._check_parameters()
+
+    def _check_parameters(self) -> None:
+        """Clear the index if it was built with a different permutation count, shingle size or banding."""
+        params = f"{self.num_perm}:{self.shingle_size}:{self.bands}"
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO index_meta (key, value) VALUES ('params', ?)", (params,))
+            stored = self.conn.execute("SELECT value FROM index_meta WHERE key = 'params'").fetchone()[0]
+        if stored != params:
+            logger.warning(f"Near-dup index {self.index_file} was built with different parameters; clearing it")
+            self.clear()
+            with self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO index_meta (key, value) VALUES ('params', ?)", (params,))
+
+    def _shingles(self, job_data: Dict) -> np.ndarray:
+        """Hash the word shingles of a job's normalized title, company and description."""
+        text = ' '.join(str(job_data.get(field) or '') for field in ('job_title', 'company', 'job_description'))
+        words = re.sub(r'[^a-z0-9]+', ' ', text.lower()).split()
+        size = min(self.shingle_size, len(words)) or 1
+        shingles = {' '.join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+        return np.array([zlib.crc32(shingle.encode('utf-8')) for shingle in shingles], dtype=np.uint64)
+
+    def signature(self, job_data: Dict) -> np.ndarray:
+        """Compute the MinHash signature of a job as a uint32 array of length ``num_perm``."""
+        shingles = self._shingles(job_data)
+        hashed = (shingles[:, None] * self._a[None, :] + self._b[None, :]) % MAX_HASH
+        return hashed.min(axis=0).astype(np.uint32)
+
+    def _band_buckets(self, signature: np.ndarray) -> List[int]:
+        """Hash each band of a signature (together with its band number) to a 64-bit bucket key."""
+        buckets = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            digest = hashlib.blake2b(band.to_bytes(2, 'little') + chunk, digest_size=8).digest()
+            buckets.append(int.from_bytes(digest, 'little', signed=True))
+        return buckets
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+
+    def similarity(self, first: np.ndarray, second: np.ndarray) -> float:
+        """Estimate the Jaccard similarity of two jobs from their signatures."""
+        return float(np.mean(first == second))
+
+    def query(self, signature: np.ndarray) -> Optional[Tuple[str, float]]:
+        """Return the most similar indexed job key and its estimated Jaccard similarity, if above threshold."""
+        buckets = self._band_buckets(signature)
+        placeholders = ', '.join('?' for _ in buckets)
+        rows = self.conn.execute(
+            f"SELECT job_key, signature FROM signatures WHERE id IN "
+            f"(SELECT doc_id FROM buckets WHERE bucket IN ({placeholders}))",
+            buckets
+        ).fetchall()
+
+        best = None
+        for job_key, stored in rows:
+            similarity = self.similarity(np.frombuffer(stored, dtype=np.uint32), signature)
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (job_key, similarity)
+        return best
+
+    def insert(self, job_key: str, signature: np.ndarray) -> None:
+        """Add a job signature and its band buckets to the index."""
+        with self.conn:
+            doc_id = self.conn.execute(
+                "INSERT INTO signatures (job_key, signature) VALUES (?, ?)", (job_key, signature.tobytes())
+            ).lastrowid
+            self.conn.executemany(
+                "INSERT INTO buckets (bucket, doc_id) VALUES (?, ?)",
+                [(bucket, doc_id) for bucket in self._band_buckets(signature)]
+            )
+
+    def clear(self) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM signatures")
+            self.conn.execute("DELETE FROM buckets")
+        logger.info(f"Cleared near-duplicate index: {self.index_file}")
+
+    def close(self) -> None:
+        self.conn.close()
+
+class BatchLSH:
+    """In-memory band buckets over the signatures of one batch, sharing a ``MinHashLSH``'s banding.
+
+    Lets a batch be checked for near-duplicates within itself before any of it is
+    written to the persistent index, comparing only signatures that share a bucket.
+    """
+
+    def __init__(self, index: MinHashLSH):
+        self.index = index
+        self.buckets: Dict[int, List[int]] = defaultdict(list)
+        self.signatures: List[np.ndarray] = []
+
+    def query(self, signature: np.ndarray) -> Optional[Tuple[int, float]]:
+        """Return the position and similarity of the most similar batch signature, if above threshold."""
+        candidates = {position for bucket in self.index._band_buckets(signature)
+                      for position in self.buckets.get(bucket, ())}
+        best = None
+        for position in candidates:
+            similarity = self.index.similarity(self.signatures[position], signature)
+            if similarity >= self.index.threshold and (best is None or similarity > best[1]):
+                best = (position, similarity)
+        return best
+
+    def insert(self, signature: np.ndarray) -> None:
+        position = len(self.signatures)
+        self.signatures.append(signature)
+        for bucket in self.index._band_buckets(signature):
+            self.buckets[bucket].append(position)
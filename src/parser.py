@@ -1,11 +1,21 @@
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
 import re
-from typing import Dict, Optional, List
+from collections import Counter
+from typing import Dict, Optional, List, Tuple
 from urllib.parse import urljoin, urlparse
 from datetime import datetime
-from utils import logger
+from utils import logger, detect_job_board
 from config import JOB_BOARD_SELECTORS
 
+# JOB_BOARD_SELECTORS keys that name a different job field
+SELECTOR_FIELDS = {'title': 'job_title', 'description': 'job_description'}
+
+# Job links on search pages whose cards the board's selectors do not recognise, with a required href fragment
+SEARCH_LINK_SELECTORS = [
+    ('a.base-card__full-link, a.job-card-container__link', '/jobs/view/'),  # LinkedIn
+    ('a.jcs-JobTitle, a.jobTitle', ''),  # Indeed
+]
+
 class HTMLParser:
     def __init__(self):
         self.job_board_patterns = {
@@ -27,21 +37,7 @@ class HTMLParser:
         """Parse job details from HTML content."""
         soup = BeautifulSoup(html, 'lxml')
         job_board = self.detect_job_board(url)
-        
-        job_data = {
-            'job_title': '',
-            'company': '',
-            'location': '',
-            'work_setting': '',
-            'job_type': '',
-            'company_logo': '',
-            'job_description': '',
-            'requirements': '',
-            'application_url': url,
-            'date_posted': '',
-            'date_collected': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'source_url': url
-        }
+        job_data = self._empty_job(url)
         
         # First check if this is a job listing page or search results page
         if self._is_search_results_page(soup, url):
@@ -50,11 +46,11 @@ class HTMLParser:
         
         # Use job board specific selectors if available
         if job_board and job_board in JOB_BOARD_SELECTORS:
-            parsed_data = self._parse_with_selectors(soup, JOB_BOARD_SELECTORS[job_board])
+            parsed_data = self._parse_with_selectors(soup, JOB_BOARD_SELECTORS[job_board], url)
             job_data.update(parsed_data)
         else:
             # Fallback to generic parsing
-            parsed_data = self._parse_generic(soup)
+            parsed_data = self._parse_generic(soup, url)
             job_data.update(parsed_data)
         
         # Clean and normalize data
@@ -62,6 +58,82 @@ class HTMLParser:
         
         return job_data
     
+    def parse_search_results(self, html: str, url: str) -> List[Dict]:
+        """Parse every job card on a search results page into a partial job.
+
+        Cards are found with the board's ``JOB_BOARD_SELECTORS``: each link matched
+        by the ``url`` selector belongs to the largest element around it that holds
+        no other job link. Fields a card does not show are left empty, and each
+        job's ``source_url`` is its own job page.
+        """
+        selectors = JOB_BOARD_SELECTORS.get(detect_job_board(url))
+        if not selectors or 'url' not in selectors:
+            return []
+        
+        soup = BeautifulSoup(html, 'lxml')
+        jobs = []
+        seen_urls = set()
+        for link, card in self._find_cards(soup, selectors['url']):
+            if not link.get('href'):
+                continue
+            job_url = urljoin(url, link['href'])
+            if job_url in seen_urls:
+                continue
+            seen_urls.add(job_url)
+            job_data = self._empty_job(job_url)
+            job_data.update(self._parse_with_selectors(card, selectors, url))
+            job_data['application_url'] = job_url
+            jobs.append(self._clean_job_data(job_data))
+        return jobs
+    
+    def parse_search_links(self, html: str, url: str) -> List[str]:
+        """Collect the job links on a search results page, for pages whose cards were not recognised."""
+        selectors = JOB_BOARD_SELECTORS.get(detect_job_board(url), {})
+        link_selectors = SEARCH_LINK_SELECTORS + ([(selectors['url'], '')] if 'url' in selectors else [])
+        
+        soup = BeautifulSoup(html, 'lxml')
+        job_urls = []
+        checked = set()
+        for selector, required in link_selectors:
+            for link in soup.select(selector):
+                # A link matched by an earlier selector keeps that selector's requirement
+                if id(link) in checked:
+                    continue
+                checked.add(id(link))
+                job_url = urljoin(url, link.get('href') or '')
+                if link.get('href') and required in job_url and job_url not in job_urls:
+                    job_urls.append(job_url)
+        return job_urls
+    
+    def _find_cards(self, soup: BeautifulSoup, link_selector: str) -> List[Tuple[Tag, Tag]]:
+        """Return (job link, card) pairs, where the card is the largest element around a link holding no other."""
+        links = soup.select(link_selector)
+        links_inside = Counter(id(parent) for link in links for parent in link.parents)
+        cards = []
+        for link in links:
+            card = link
+            while card.parent is not None and links_inside[id(card.parent)] == 1:
+                card = card.parent
+            cards.append((link, card))
+        return cards
+    
+    def _empty_job(self, url: str) -> Dict:
+        """Return a job record for a URL with every field empty."""
+        return {
+            'job_title': '',
+            'company': '',
+            'location': '',
+            'work_setting': '',
+            'job_type': '',
+            'company_logo': '',
+            'job_description': '',
+            'requirements': '',
+            'application_url': url,
+            'date_posted': '',
+            'date_collected': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'source_url': url
+        }
+    
     def _is_search_results_page(self, soup: BeautifulSoup, url: str) -> bool:
         """Check if the page is a search results page rather than job detail."""
         # Check URL patterns for search results
@@ -91,8 +163,8 @@ class HTMLParser:
             
         return False
     
-    def _parse_with_selectors(self, soup: BeautifulSoup, selectors: Dict) -> Dict:
-        """Parse job data using CSS selectors."""
+    def _parse_with_selectors(self, soup: BeautifulSoup, selectors: Dict, url: str) -> Dict:
+        """Parse job data using CSS selectors, resolving links against the page URL."""
         result = {}
         
         for field, selector in selectors.items():
@@ -100,18 +172,18 @@ class HTMLParser:
                 if field == 'url':
                     element = soup.select_one(selector)
                     if element and element.get('href'):
-                        result['application_url'] = urljoin('https://www.indeed.com', element['href'])
+                        result['application_url'] = urljoin(url, element['href'])
                 else:
                     element = soup.select_one(selector)
                     if element:
-                        result[field] = element.get_text(strip=True)
+                        result[SELECTOR_FIELDS.get(field, field)] = element.get_text(strip=True)
             except Exception as e:
                 logger.debug(f"Error parsing {field} with selector {selector}: {e}")
         
         return result
     
-    def _parse_generic(self, soup: BeautifulSoup) -> Dict:
-        """Generic parsing fallback when no specific selectors are available."""
+    def _parse_generic(self, soup: BeautifulSoup, url: str) -> Dict:
+        """Generic parsing fallback when no specific selectors are available, resolving links against the page URL."""
         result = {}
         logo_selectors = [
             'meta[property="og:image"]',
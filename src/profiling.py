@@ -0,0 +1,146 @@
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List
+
+from utils import logger
+from config import PROFILES_DIR, PROFILE_SAMPLE_INTERVAL, PROFILE_TOP_N, PROFILE_TRACEMALLOC_FRAMES
+
+PROFILE_MODES = ['cprofile', 'sample']
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval from a background thread.
+
+    Stacks are counted in the collapsed format (``outer;inner count`` per line)
+    read by flamegraph.pl, speedscope and similar tools.
+    """
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.thread.join()
+
+    def _run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{Path(code.co_filename).name}:{code.co_name}")
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def write(self, path: Path) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+class RunProfiler:
+    """Optional CPU and memory profile of a scraping run, written under the profiles directory.
+
+    ``start`` wraps the run in cProfile or a stack sampler and begins tracing
+    allocations; ``stage`` snapshots memory around a pipeline stage; ``stop``
+    writes the CPU profile and a top-N allocation report per stage. While no
+    profile is running, ``stage`` costs nothing.
+    """
+
+    def __init__(self):
+        self.mode = None
+        self.profile = None
+        self.sampler = None
+        self.started_at = None
+        self.stage_reports: List[str] = []
+
+    @property
+    def active(self) -> bool:
+        return self.mode is not None
+
+    def start(self, mode: str = 'cprofile') -> None:
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.mode = mode
+        self.started_at = datetime.now()
+        self.stage_reports = []
+        tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+        if mode == 'cprofile':
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        else:
+            self.sampler = StackSampler(threading.get_ident())
+            self.sampler.start()
+        logger.info(f"Profiling this run with {mode}")
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Record the memory allocated by a pipeline stage and still held when it ends."""
+        if not self.active:
+            yield
+            return
+        before = tracemalloc.take_snapshot()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            after = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            lines = [f"== {name}: {seconds:.2f}s, traced {current / 1e6:.1f} MB (peak {peak / 1e6:.1f} MB)"]
+            for stat in after.compare_to(before, 'lineno')[:PROFILE_TOP_N]:
+                lines.append(str(stat))
+            self.stage_reports.append('\n'.join(lines))
+
+    def stop(self, output_dir: Path = PROFILES_DIR) -> List[Path]:
+        """Stop profiling, write the reports and return their paths."""
+        if not self.active:
+            return []
+        if self.profile:
+            self.profile.disable()
+        if self.sampler:
+            self.sampler.stop()
+        tracemalloc.stop()
+
+        written = []
+        try:
+            output_dir.mkdir(parents=True, exist_ok=True)
+            prefix = output_dir / f"profile_{self.started_at:%Y%m%d_%H%M%S_%f}"
+            if self.profile:
+                stats_file = prefix.with_suffix('.prof')
+                self.profile.dump_stats(stats_file)
+                summary = io.StringIO()
+                pstats.Stats(self.profile, stream=summary).sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+                summary_file = Path(f"{prefix}_cumulative.txt")
+                summary_file.write_text(summary.getvalue(), encoding='utf-8')
+                written += [stats_file, summary_file]
+            if self.sampler:
+                collapsed_file = prefix.with_suffix('.collapsed')
+                self.sampler.write(collapsed_file)
+                written.append(collapsed_file)
+            memory_file = Path(f"{prefix}_memory.txt")
+            memory_file.write_text('\n\n'.join(self.stage_reports) + '\n', encoding='utf-8')
+            written.append(memory_file)
+            logger.info(f"Wrote profile: {', '.join(str(path) for path in written)}")
+        except Exception as e:
+            logger.error(f"Error writing profile: {e}")
+        finally:
+            self.mode = self.profile = self.sampler = None
+        return written
+
+PROFILER = RunProfiler()
@@ -0,0 +1,172 @@
+import json
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils import logger
+from config import RUN_REPORTS_DIR
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """Return nearest-rank p50/p95/p99 of the values (None when there are none)."""
+    ordered = sorted(values)
+    result = {}
+    for q in (50, 95, 99):
+        if not ordered:
+            result[f'p{q}'] = None
+            continue
+        rank = max(math.ceil(q / 100 * len(ordered)), 1)
+        result[f'p{q}'] = round(ordered[rank - 1], 4)
+    return result
+
+class RunReport:
+    """Per-run performance figures written as a JSON file after each run.
+
+    The scraper records into the process-wide ``RUN_REPORT`` as it goes, and
+    ``run_scraping`` resets it at the start of a run and writes it at the end.
+    Worker processes drain their own report after each page and the coordinator
+    merges them into its own.
+    """
+
+    # Figures a worker process sends to the coordinator with ``drain``
+    DRAINED_FIELDS = ('sleep_seconds', 'urls', 'tiers', 'fetch_seconds', 'parse_seconds', 'block_indicators',
+                      'errors', 'dedup', 'storage_write_seconds')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.started_at = time.time()
+            self._clear()
+
+    def _clear(self) -> None:
+        self.sleep_seconds = 0.0
+        self.urls = defaultdict(Counter)
+        self.tiers = defaultdict(Counter)
+        self.fetch_seconds = defaultdict(list)
+        self.parse_seconds = []
+        self.block_indicators = Counter()
+        self.errors = defaultdict(Counter)
+        self.dedup = {'scraped': 0, 'duplicates': 0}
+        self.storage_write_seconds = 0.0
+
+    def drain(self) -> Dict:
+        """Return the figures recorded since the last drain and start them afresh."""
+        with self.lock:
+            snapshot = {name: getattr(self, name) for name in self.DRAINED_FIELDS}
+            self._clear()
+        return snapshot
+
+    def merge(self, snapshot: Dict) -> None:
+        """Add figures drained from a worker process's report.
+
+        Worker sleeps overlap the coordinator's wall time, so their sleep time is
+        left out rather than subtracted from it.
+        """
+        with self.lock:
+            for board, counts in snapshot['urls'].items():
+                self.urls[board].update(counts)
+            for tier, counts in snapshot['tiers'].items():
+                self.tiers[tier].update(counts)
+            for tier, seconds in snapshot['fetch_seconds'].items():
+                self.fetch_seconds[tier].extend(seconds)
+            self.parse_seconds.extend(snapshot['parse_seconds'])
+            self.block_indicators.update(snapshot['block_indicators'])
+            for tier, messages in snapshot['errors'].items():
+                self.errors[tier].update(messages)
+            for key, count in snapshot['dedup'].items():
+                self.dedup[key] += count
+            self.storage_write_seconds += snapshot['storage_write_seconds']
+
+    def sleep(self, seconds: float) -> None:
+        """Sleep, counting the time as deliberate delay rather than work."""
+        self.record_sleep(seconds)
+        time.sleep(seconds)
+
+    def record_sleep(self, seconds: float) -> None:
+        with self.lock:
+            self.sleep_seconds += seconds
+
+    def count_urls(self, board: str, outcome: str, count: int = 1) -> None:
+        """Count URLs for a board as discovered, skipped, fetched or failed."""
+        with self.lock:
+            self.urls[board or 'unknown'][outcome] += count
+
+    def record_fetch(self, tier: str, seconds: float, outcome: str, size: int = 0) -> None:
+        """Record one fetch attempt: its latency, outcome and page size in bytes."""
+        with self.lock:
+            self.tiers[tier]['attempts'] += 1
+            self.tiers[tier][outcome] += 1
+            self.tiers[tier]['bytes'] += size
+            self.fetch_seconds[tier].append(seconds)
+
+    def record_parse(self, seconds: float) -> None:
+        with self.lock:
+            self.parse_seconds.append(seconds)
+
+    def record_block(self, indicator: str) -> None:
+        with self.lock:
+            self.block_indicators[indicator] += 1
+
+    def record_error(self, tier: str, error: Exception) -> None:
+        """Count a fetch error by its first line, so repeated timeouts group together."""
+        message = str(error).strip().splitlines()[0][:200] if str(error).strip() else type(error).__name__
+        with self.lock:
+            self.errors[tier][message] += 1
+
+    def record_dedup(self, scraped: int, unique: int) -> None:
+        with self.lock:
+            self.dedup['scraped'] += scraped
+            self.dedup['duplicates'] += scraped - unique
+
+    def record_storage(self, seconds: float) -> None:
+        with self.lock:
+            self.storage_write_seconds += seconds
+
+    def to_dict(self, status: str = 'succeeded') -> Dict:
+        with self.lock:
+            finished_at = time.time()
+            duration = finished_at - self.started_at
+            scraped = self.dedup['scraped']
+            return {
+                'started_at': datetime.fromtimestamp(self.started_at).isoformat(timespec='seconds'),
+                'finished_at': datetime.fromtimestamp(finished_at).isoformat(timespec='seconds'),
+                'status': status,
+                'duration_seconds': round(duration, 3),
+                'sleep_seconds': round(self.sleep_seconds, 3),
+                'work_seconds': round(max(duration - self.sleep_seconds, 0), 3),
+                'urls': {board: dict(counts) for board, counts in sorted(self.urls.items())},
+                'tiers': {
+                    tier: {**dict(counts), 'fetch_seconds': percentiles(self.fetch_seconds[tier])}
+                    for tier, counts in sorted(self.tiers.items())
+                },
+                'parse_seconds': percentiles(self.parse_seconds),
+                'block_indicators': dict(self.block_indicators.most_common()),
+                'errors': {tier: dict(messages.most_common(10)) for tier, messages in sorted(self.errors.items())},
+                'dedup': {
+                    **self.dedup,
+                    'hit_rate': round(self.dedup['duplicates'] / scraped, 4) if scraped else None,
+                },
+                'storage_write_seconds': round(self.storage_write_seconds, 3),
+            }
+
+    def write(self, status: str = 'succeeded', reports_dir: Path = RUN_REPORTS_DIR) -> Optional[Path]:
+        """Write the report to a timestamped JSON file and return its path."""
+        try:
+            reports_dir.mkdir(parents=True, exist_ok=True)
+            # Microseconds keep runs started within the same second from overwriting each other's report
+            report_file = reports_dir / f"run_{datetime.fromtimestamp(self.started_at):%Y%m%d_%H%M%S_%f}.json"
+            with open(report_file, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(status), f, indent=2)
+            logger.info(f"Wrote run report: {report_file}")
+            return report_file
+        except Exception as e:
+            logger.error(f"Error writing run report: {e}")
+            return None
+
+RUN_REPORT = RunReport()
@@ -0,0 +1,93 @@
+import os
+import time
+from typing import Optional
+
+from utils import logger
+from config import OUTPUT_FORMATS, SKIP_SEEN_URLS, RUNTIME_MAX_AGE_HOURS, RUNTIME_MAX_RSS_MB, ensure_directories
+from scraper import JobScraper
+from storage import JobStorage
+from deduplicator import Deduplicator
+from dedup_index import SeenUrlIndex
+from frontier import CrawlFrontier
+
+def current_rss_mb() -> Optional[float]:
+    """Return this process's resident memory in MB, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+class ScraperRuntime:
+    """Scraper, browser, storage, dedup index and crawl frontier shared across runs.
+
+    The components are created on the first run and kept warm between scheduled
+    runs. Before each run they are health-checked and, once they are older than
+    ``max_age_hours`` or the process exceeds ``max_rss_mb``, recycled.
+    """
+
+    def __init__(self, max_age_hours: Optional[float] = RUNTIME_MAX_AGE_HOURS,
+                 max_rss_mb: Optional[float] = RUNTIME_MAX_RSS_MB):
+        self.max_age_hours = max_age_hours
+        self.max_rss_mb = max_rss_mb
+        self.started_at = None
+        self.scraper = None
+        self.storage = None
+        self.deduplicator = None
+        self.seen_urls = None
+        self.frontier = None
+
+    def start(self) -> None:
+        """Create every component."""
+        start_time = time.time()
+        ensure_directories()
+        self.frontier = CrawlFrontier()
+        self.scraper = JobScraper(use_selenium=False, use_playwright=True)
+        self.storage = JobStorage(OUTPUT_FORMATS)
+        self.deduplicator = Deduplicator(self.storage)
+        self.seen_urls = SeenUrlIndex() if SKIP_SEEN_URLS else None
+        self.started_at = time.time()
+        logger.info(f"Scraper runtime started in {self.started_at - start_time:.2f} seconds")
+
+    def prepare(self) -> None:
+        """Make the components ready for a run, starting or recycling them as needed."""
+        if self.started_at is None:
+            self.start()
+            return
+
+        reason = self._recycle_reason()
+        if reason:
+            logger.info(f"Recycling scraper runtime: {reason}")
+            self.close()
+            self.start()
+        else:
+            # Warm components still need the retention window applied as time passes
+            self.deduplicator.evict_expired()
+
+    def _recycle_reason(self) -> Optional[str]:
+        """Return why the components should be rebuilt, or None if they are healthy."""
+        age_hours = (time.time() - self.started_at) / 3600
+        if self.max_age_hours is not None and age_hours > self.max_age_hours:
+            return f"age {age_hours:.1f}h exceeds {self.max_age_hours}h"
+        rss = current_rss_mb()
+        if self.max_rss_mb is not None and rss is not None and rss > self.max_rss_mb:
+            return f"memory {rss:.0f} MB exceeds {self.max_rss_mb} MB"
+        if not self.scraper.is_healthy():
+            return "browser is disconnected"
+        return None
+
+    def close(self) -> None:
+        """Shut down every component."""
+        if self.scraper:
+            self.scraper.close()
+        if self.deduplicator:
+            self.deduplicator.existing_hashes.close()
+            if self.deduplicator.near_index is not None:
+                self.deduplicator.near_index.close()
+        if self.seen_urls:
+            self.seen_urls.close()
+        if self.frontier:
+            self.frontier.close()
+        self.started_at = None
+        self.scraper = self.storage = self.deduplicator = self.seen_urls = self.frontier = None
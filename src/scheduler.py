@@ -1,46 +1,99 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.triggers.date import DateTrigger
+from apscheduler.events import EVENT_JOB_SUBMITTED, EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES
+import heapq
+import threading
 import time
 import signal
 import sys
-from typing import Callable
-from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from datetime import datetime, timedelta
 
 from utils import logger
-from config import SCRAPING_INTERVAL_HOURS
+from metrics import RUN_SECONDS, RUNS, RUN_LAG_SECONDS
+from config import (SCRAPING_INTERVAL_HOURS, SCHEDULER_TICK_SECONDS, SCHEDULER_MAX_SOURCES_PER_RUN,
+                    ADAPTIVE_MIN_INTERVAL_HOURS, ADAPTIVE_MAX_INTERVAL_HOURS, ADAPTIVE_HIGH_YIELD_JOBS,
+                    ADAPTIVE_SPEEDUP, ADAPTIVE_BACKOFF, SCHEDULER_MISFIRE_GRACE_SECONDS,
+                    SCHEDULE_DELAY_AFTER_FINISH_MINUTES)
 
 class ScrapingScheduler:
-    def __init__(self, scraping_function: Callable, interval_hours: int = SCRAPING_INTERVAL_HOURS):
+    """Run the scraper on a schedule.
+
+    Given sources, each one keeps its own interval: a priority queue ordered by next
+    due time is checked every tick, the highest-priority due sources are scraped
+    together, and each source's interval adapts to how many new jobs it produced.
+    Without sources, the whole scrape reruns every ``interval_hours``.
+
+    Only one run is ever in flight: fires that arrive while a run is going are
+    skipped, and fires missed meanwhile are coalesced into one. With
+    ``delay_after_finish`` (minutes) the next run is instead scheduled that long
+    after the previous one finishes.
+    """
+
+    def __init__(self, scraping_function: Callable, interval_hours: float = SCRAPING_INTERVAL_HOURS,
+                 sources: Optional[List[Dict]] = None, max_sources_per_run: int = SCHEDULER_MAX_SOURCES_PER_RUN,
+                 delay_after_finish: Optional[float] = SCHEDULE_DELAY_AFTER_FINISH_MINUTES):
         self.scraping_function = scraping_function
         self.interval_hours = interval_hours
+        self.max_sources_per_run = max_sources_per_run
+        self.delay_after_finish = delay_after_finish
         self.scheduler = BackgroundScheduler()
+        self.scheduler.add_listener(self._on_job_event, EVENT_JOB_SUBMITTED | EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
         self.is_running = False
+        
+        # Single-flight guard and run state reported by status()
+        self.run_lock = threading.Lock()
+        self.state = {
+            'running': False,
+            'runs': 0,
+            'failed_runs': 0,
+            'skipped_runs': 0,
+            'missed_runs': 0,
+            'coalesced_runs': 0,
+            'last_started_at': None,
+            'last_finished_at': None,
+            'last_duration': None,
+            'last_lag': None,
+        }
+        
+        # Heap of (next due time, -priority, url); every source starts out due
+        self.sources: Dict[str, Dict] = {}
+        self.queue = []
+        for source in sources or []:
+            self.add_source(source)
+    
+    def add_source(self, source: Dict, due_at: Optional[float] = None) -> None:
+        """Schedule a source, using the default interval if it has none."""
+        source = dict(source)
+        source['interval'] = source.get('interval') or self.interval_hours
+        self.sources[source['url']] = source
+        heapq.heappush(self.queue, (due_at or time.time(), -source.get('priority', 0), source['url']))
     
     def start(self) -> None:
         """Start the scheduling service."""
         try:
-            # Add job to scheduler
-            trigger = IntervalTrigger(hours=self.interval_hours)
-            self.scheduler.add_job(
-                self._run_scraping,
-                trigger=trigger,
-                id='job_scraping',
-                name='Job Board Scraping',
-                replace_existing=True
-            )
-            
-            # Run immediately on start
-            self._run_scraping()
+            # Add job to scheduler; the first run starts as soon as the scheduler does
+            self._schedule_next(datetime.now())
             
             # Set up signal handlers for graceful shutdown
             signal.signal(signal.SIGINT, self._signal_handler)
             signal.signal(signal.SIGTERM, self._signal_handler)
             
             # Start scheduler
-            self.scheduler.start()
             self.is_running = True
+            self.scheduler.start()
             
-            logger.info(f"Scheduler started. Running every {self.interval_hours} hours.")
+            if self.delay_after_finish is not None:
+                cadence = f"{self.delay_after_finish} minutes after each run finishes"
+            elif self.sources:
+                cadence = f"every {SCHEDULER_TICK_SECONDS} seconds"
+            else:
+                cadence = f"every {self.interval_hours} hours"
+            if self.sources:
+                logger.info(f"Scheduler started with {len(self.sources)} sources. Checking for due sources {cadence}.")
+            else:
+                logger.info(f"Scheduler started. Running {cadence}.")
             
             # Keep main thread alive
             while self.is_running:
@@ -50,19 +103,139 @@ class ScrapingScheduler:
             logger.error(f"Failed to start scheduler: {e}")
             self.stop()
     
-    def _run_scraping(self) -> None:
+    def _schedule_next(self, run_time: datetime) -> None:
+        """Add or replace the scheduled job, either on a fixed interval or as a one-off run."""
+        if self.delay_after_finish is not None:
+            trigger = DateTrigger(run_date=run_time)
+        elif self.sources:
+            trigger = IntervalTrigger(seconds=SCHEDULER_TICK_SECONDS)
+        else:
+            trigger = IntervalTrigger(hours=self.interval_hours)
+        self.scheduler.add_job(
+            self._execute,
+            trigger=trigger,
+            next_run_time=run_time,
+            id='job_scraping',
+            name='Job Board Scraping',
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+            misfire_grace_time=SCHEDULER_MISFIRE_GRACE_SECONDS
+        )
+    
+    def _execute(self) -> None:
+        """Scheduled entry point: run unless another run is still in flight."""
+        if not self.run_lock.acquire(blocking=False):
+            self.state['skipped_runs'] += 1
+            logger.warning("Previous scraping run is still in progress; skipping this one")
+            return
+        try:
+            if self.sources:
+                self._run_due_sources()
+            else:
+                self._run_scraping()
+        finally:
+            self.run_lock.release()
+            if self.delay_after_finish is not None and self.is_running:
+                self._schedule_next(datetime.now() + timedelta(minutes=self.delay_after_finish))
+    
+    def _on_job_event(self, event) -> None:
+        """Record start lag, coalesced fires and skipped or missed runs reported by APScheduler."""
+        if event.code == EVENT_JOB_SUBMITTED:
+            scheduled = event.scheduled_run_times
+            self.state['last_lag'] = (datetime.now(scheduled[-1].tzinfo) - scheduled[-1]).total_seconds()
+            RUN_LAG_SECONDS.set(self.state['last_lag'])
+            if len(scheduled) > 1:
+                self.state['coalesced_runs'] += len(scheduled) - 1
+                logger.warning(f"Coalesced {len(scheduled)} missed scraping runs into one")
+        elif event.code == EVENT_JOB_MAX_INSTANCES:
+            # Expected every tick while a per-source run is going, so only whole-run skips are warnings
+            self.state['skipped_runs'] += 1
+            log = logger.debug if self.sources else logger.warning
+            log("Previous scraping run is still in progress; skipping this one")
+        elif event.code == EVENT_JOB_MISSED:
+            self.state['missed_runs'] += 1
+            logger.warning(f"Scraping run scheduled for {event.scheduled_run_time} was missed")
+    
+    def status(self) -> Dict:
+        """Return the current run state, including the last run's duration and start lag in seconds."""
+        status = dict(self.state)
+        job = self.scheduler.get_job('job_scraping') if self.scheduler.running else None
+        status['next_run_time'] = job.next_run_time if job else None
+        return status
+    
+    def _run_due_sources(self) -> None:
+        """Scrape the highest-priority due sources, up to the per-run budget, and reschedule them."""
+        now = time.time()
+        due = []
+        while self.queue and self.queue[0][0] <= now:
+            due.append(heapq.heappop(self.queue))
+        if not due:
+            return
+        
+        # Highest priority first, then longest overdue; the rest stay due for the next tick
+        due.sort(key=lambda entry: (entry[1], entry[0]))
+        batch, deferred = due[:self.max_sources_per_run], due[self.max_sources_per_run:]
+        for entry in deferred:
+            heapq.heappush(self.queue, entry)
+        if deferred:
+            logger.info(f"{len(deferred)} due sources deferred to the next run")
+        
+        results = {}
+        self._run_scraping(
+            sources=[self.sources[url] for _, _, url in batch],
+            on_source_result=results.__setitem__
+        )
+        for _, _, url in batch:
+            self._reschedule(url, results.get(url))
+    
+    def _reschedule(self, url: str, new_jobs: Optional[int]) -> None:
+        """Adapt a source's interval to its latest yield and queue its next run.
+
+        Sources that produced many new jobs are checked more often, sources that
+        produced none back off; a failed run (no result) keeps the interval.
+        """
+        source = self.sources[url]
+        interval = source['interval']
+        if new_jobs is not None:
+            if new_jobs >= ADAPTIVE_HIGH_YIELD_JOBS:
+                interval *= ADAPTIVE_SPEEDUP
+            elif new_jobs == 0:
+                interval *= ADAPTIVE_BACKOFF
+            interval = min(max(interval, ADAPTIVE_MIN_INTERVAL_HOURS), ADAPTIVE_MAX_INTERVAL_HOURS)
+            if interval != source['interval']:
+                logger.info(f"{new_jobs} new jobs from {url}; interval {source['interval']:.2f}h -> {interval:.2f}h")
+                source['interval'] = interval
+        heapq.heappush(self.queue, (time.time() + interval * 3600, -source.get('priority', 0), url))
+    
+    def _run_scraping(self, **kwargs) -> None:
         """Run the scraping function with error handling."""
+        self.state['running'] = True
+        self.state['last_started_at'] = datetime.now()
+        start_time = time.time()
         try:
             logger.info("Starting scheduled scraping run")
-            start_time = time.time()
             
-            self.scraping_function()
+            if self.scraping_function(**kwargs) is False:
+                self.state['failed_runs'] += 1
+                RUNS.inc(status='failed')
+            else:
+                RUNS.inc(status='succeeded')
             
             elapsed = time.time() - start_time
-            logger.info(f"Scraping run completed in {elapsed:.2f} seconds")
+            lag = self.state['last_lag'] or 0
+            logger.info(f"Scraping run completed in {elapsed:.2f} seconds (started {lag:.2f} seconds late)")
             
         except Exception as e:
+            self.state['failed_runs'] += 1
+            RUNS.inc(status='failed')
             logger.error(f"Error during scheduled scraping: {e}")
+        finally:
+            self.state['running'] = False
+            self.state['runs'] += 1
+            self.state['last_finished_at'] = datetime.now()
+            self.state['last_duration'] = time.time() - start_time
+            RUN_SECONDS.observe(self.state['last_duration'])
     
     def _signal_handler(self, signum, frame) -> None:
         """Handle shutdown signals."""
@@ -72,7 +245,7 @@ class ScrapingScheduler:
     
     def stop(self) -> None:
         """Stop the scheduling service."""
+        self.is_running = False
         if self.scheduler.running:
             self.scheduler.shutdown()
-        self.is_running = False
         logger.info("Scheduler stopped")
\ No newline at end of file
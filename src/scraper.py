@@ -1,39 +1,22 @@
 import requests
-from typing import List, Dict, Optional
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException
+from typing import List, Dict, Optional, Iterable, Callable, Tuple
 import time
 from urllib.parse import urljoin, urlparse
 import asyncio
-import playwright
-from playwright.async_api import async_playwright
 import random
 
-from utils import logger, retry, get_random_user_agent
+from utils import logger, get_random_user_agent, detect_job_board
+from user_agents import USER_AGENT_POOL
 from parser import HTMLParser
-from config import USE_PROXIES, PROXIES, USE_STEALTH, REQUEST_TIMEOUT
+from metrics import FETCH_SECONDS, FETCHES, STAGE_SECONDS
+from report import RUN_REPORT
+from config import (USE_PROXIES, PROXIES, USE_STEALTH, REQUEST_TIMEOUT, SCRAPER_PROXY, PAGE_DELAY_RANGE,
+                    REQUESTS_DELAY_RANGE, BROWSER_SETTLE_RANGE, SELENIUM_SETTLE_SECONDS, URL_DELAY_BASE,
+                    URL_DELAY_SPREAD)
 
-def get_random_headers():
-    """Generate random headers for requests."""
-    return {
-        'User-Agent': get_random_user_agent(),
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Accept-Encoding': 'gzip, deflate',
-        'DNT': '1',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-        'Sec-Fetch-Dest': 'document',
-        'Sec-Fetch-Mode': 'navigate',
-        'Sec-Fetch-Site': 'none',
-        'Sec-Fetch-User': '?1',
-        'Cache-Control': 'max-age=0',
-        'Referer': 'https://www.google.com/',
-    }
+def get_random_headers(url: Optional[str] = None) -> Dict[str, str]:
+    """Return the headers of a pooled browser profile, sticky to the URL's host when one is given."""
+    return dict(USER_AGENT_POOL.for_url(url).headers)
 
 async def human_delay():
     """Add human-like delay between requests."""
@@ -51,24 +34,28 @@ class JobScraper:
         self.page = None
         self.playwright = None
         
+        # Own event loop, so the scraper can be reused from whichever thread runs the next scrape
+        self.loop = asyncio.new_event_loop()
+        
         # Set realistic headers
         self.session.headers.update(get_random_headers())
+        if SCRAPER_PROXY:
+            self.session.proxies = {'http': SCRAPER_PROXY, 'https': SCRAPER_PROXY}
         
         if use_selenium:
             self._init_selenium()
             
             # 🔹 Pre-initialize Playwright if enabled
         if use_playwright:
-            try:
-                loop = asyncio.get_event_loop()
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            loop.run_until_complete(self.setup_playwright())
+            self.loop.run_until_complete(self.setup_playwright())
     
     def _init_selenium(self) -> None:
         """Initialize Selenium WebDriver with stealth options."""
         try:
+            # Selenium is optional and slow to import, so it is only loaded when enabled
+            from selenium import webdriver
+            from selenium.webdriver.chrome.options import Options
+
             chrome_options = Options()
             chrome_options.add_argument('--headless=new')
             chrome_options.add_argument('--no-sandbox')
@@ -82,6 +69,8 @@ class JobScraper:
             chrome_options.add_argument('--disable-popup-blocking')
             chrome_options.add_argument('--start-maximized')
             chrome_options.add_argument(f'--user-agent={get_random_user_agent()}')
+            if SCRAPER_PROXY:
+                chrome_options.add_argument(f'--proxy-server={SCRAPER_PROXY}')
             
             self.driver = webdriver.Chrome(options=chrome_options)
             self.driver.set_page_load_timeout(REQUEST_TIMEOUT)
@@ -100,10 +89,12 @@ class JobScraper:
             await self.setup_playwright()
         
         try:
+            profile = USER_AGENT_POOL.for_url(search_url)
             context = await self.browser.new_context(
-                user_agent=get_random_user_agent(),
+                user_agent=profile.user_agent,
                 viewport={'width': 1920, 'height': 1080},
-                locale='en-US'
+                locale=profile.locale,
+                extra_http_headers=profile.headers
             )
             
             page = await context.new_page()
@@ -138,6 +129,8 @@ class JobScraper:
     async def setup_playwright(self) -> None:
         """Setup Playwright browser with stealth, headers, and proxies."""
         try:
+            from playwright.async_api import async_playwright
+
             self.playwright = await async_playwright().start()
             
             # # Use proxy if configured
@@ -164,7 +157,8 @@ class JobScraper:
                     '--no-sandbox',
                     '--disable-setuid-sandbox',
                     '--disable-dev-shm-usage'
-                ]
+                ],
+                proxy={'server': SCRAPER_PROXY} if SCRAPER_PROXY else None
             )
 
             # Open new page with random headers
@@ -207,59 +201,114 @@ class JobScraper:
             });
         """)
     
-    @retry(max_retries=2, delay=5)
     def scrape_url(self, url: str) -> Optional[Dict]:
         """Scrape a single job URL."""
-        logger.info(f"Scraping: {url}")
+        logger.info("Scraping: %s", url, extra={'url': url, 'board': detect_job_board(url)})
 
         try:
-            time.sleep(random.uniform(4, 6))  # human-like delay
-            loop = asyncio.get_event_loop()
+            RUN_REPORT.sleep(random.uniform(*PAGE_DELAY_RANGE))  # human-like delay
 
             # 🔹 Force Playwright first for LinkedIn
             if "linkedin.com" in url and self.use_playwright and self.playwright_initialized:
-                html = loop.run_until_complete(self._scrape_with_playwright(url))
-                if html and self._is_valid_html(html, url):
-                    job_data = self.parser.parse_job_page(html, url)
-                    if job_data and job_data.get("job_title"):
-                        return job_data
-                logger.warning(f"Playwright failed for LinkedIn URL: {url}")
-                return None
-
-            # Try requests first
-            html = self._scrape_with_requests(url)
-            if html and self._is_valid_html(html, url):
-                job_data = self.parser.parse_job_page(html, url)
-                if job_data and job_data.get("job_title"):
+                job_data = self._try_tier('playwright', url, self._fetch_with_playwright)
+                if job_data:
                     return job_data
+                logger.warning("Playwright failed for LinkedIn URL: %s", url, extra={'url': url, 'board': 'linkedin'})
+                return None
 
-            # Fallback to Playwright
+            # Try requests first, then fall back to Playwright and Selenium
+            tiers = [('requests', self._scrape_with_requests)]
             if self.use_playwright and self.playwright_initialized:
-                html = loop.run_until_complete(self._scrape_with_playwright(url))
-                if html and self._is_valid_html(html, url):
-                    job_data = self.parser.parse_job_page(html, url)
-                    if job_data and job_data.get("job_title"):
-                        return job_data
-
-            # Fallback to Selenium
+                tiers.append(('playwright', self._fetch_with_playwright))
             if self.use_selenium and self.selenium_initialized:
-                html = self._scrape_with_selenium(url)
-                if html and self._is_valid_html(html, url):
-                    job_data = self.parser.parse_job_page(html, url)
-                    if job_data and job_data.get("job_title"):
-                        return job_data
+                tiers.append(('selenium', self._scrape_with_selenium))
+
+            for tier, fetch in tiers:
+                job_data = self._try_tier(tier, url, fetch)
+                if job_data:
+                    return job_data
 
-            logger.warning(f"All scraping methods failed for: {url}")
+            logger.warning("All scraping methods failed for: %s", url, extra={'url': url, 'outcome': 'failed'})
             return None
 
         except Exception as e:
-            logger.error(f"Error scraping {url}: {e}")
+            logger.error("Error scraping %s: %s", url, e, extra={'url': url, 'outcome': 'error'})
+            return None
+
+    def extract_jobs_from_search(self, search_url: str) -> Tuple[List[Dict], List[str]]:
+        """Parse a search results page into partial jobs from its cards, or else its job links.
+
+        The page is fetched with requests, then Playwright, until one returns cards
+        the board's selectors recognise or job links. Returns the card jobs and the
+        harvested links; both are empty if neither fetch finds any.
+        """
+        board = detect_job_board(search_url)
+        tiers = [('requests', self._scrape_with_requests)]
+        if self.use_playwright and self.playwright_initialized:
+            tiers.append(('playwright', self._fetch_with_playwright))
+
+        for tier, fetch in tiers:
+            html = fetch(search_url)
+            if not html or not self._is_valid_html(html, search_url):
+                continue
+            with STAGE_SECONDS.time(stage='parse', board=board):
+                jobs = self.parser.parse_search_results(html, search_url)
+                job_urls = [] if jobs else self.parser.parse_search_links(html, search_url)
+            if jobs:
+                logger.info("Parsed %d job cards from %s with %s", len(jobs), search_url, tier,
+                            extra={'url': search_url, 'board': board, 'tier': tier})
+                return jobs, []
+            if job_urls:
+                logger.info("Collected %d job links from %s with %s", len(job_urls), search_url, tier,
+                            extra={'url': search_url, 'board': board, 'tier': tier})
+                return [], job_urls
+        return [], []
+
+    def _try_tier(self, tier: str, url: str, fetch: Callable[[str], Optional[str]]) -> Optional[Dict]:
+        """Fetch, validate and parse a page with one tier, recording timings per stage and board."""
+        board = detect_job_board(url)
+        start = time.perf_counter()
+        html = fetch(url)
+        fetch_seconds = time.perf_counter() - start
+        FETCH_SECONDS.observe(fetch_seconds, tier=tier, board=board)
+        if not html:
+            FETCHES.inc(tier=tier, board=board, outcome='error')
+            RUN_REPORT.record_fetch(tier, fetch_seconds, 'error')
+            return None
+
+        with STAGE_SECONDS.time(stage='validation', board=board):
+            valid = self._is_valid_html(html, url)
+        if not valid:
+            FETCHES.inc(tier=tier, board=board, outcome='blocked')
+            RUN_REPORT.record_fetch(tier, fetch_seconds, 'blocked', len(html.encode('utf-8')))
             return None
 
+        start = time.perf_counter()
+        job_data = self.parser.parse_job_page(html, url)
+        parse_seconds = time.perf_counter() - start
+        STAGE_SECONDS.observe(parse_seconds, stage='parse', board=board)
+        RUN_REPORT.record_parse(parse_seconds)
+        outcome = 'success' if job_data and job_data.get("job_title") else 'unparsed'
+        FETCHES.inc(tier=tier, board=board, outcome=outcome)
+        logger.info("Fetched %s with %s in %.2fs: %s", url, tier, fetch_seconds, outcome,
+                    extra={'url': url, 'board': board, 'tier': tier, 'latency': round(fetch_seconds, 3),
+                           'outcome': outcome})
+        RUN_REPORT.record_fetch(tier, fetch_seconds, outcome, len(html.encode('utf-8')))
+        return job_data if outcome == 'success' else None
+
+    def _fetch_with_playwright(self, url: str) -> Optional[str]:
+        return self.loop.run_until_complete(self._scrape_with_playwright(url))
+
+    def is_healthy(self) -> bool:
+        """Whether the scraper's browser, if one was launched, is still connected."""
+        if self.playwright_initialized:
+            return self.browser is not None and self.browser.is_connected()
+        return True
     
     def _is_valid_html(self, html: str, url: str) -> bool:
         """Check if HTML is valid and not a blocking page."""
         if not html or len(html) < 1000:
+            RUN_REPORT.record_block('short page')
             return False
         
         # Check for common blocking indicators
@@ -274,7 +323,8 @@ class JobScraper:
         html_lower = html.lower()
         for indicator in blocking_indicators:
             if indicator in html_lower:
-                logger.warning(f"Blocking detected on {url}: {indicator}")
+                logger.warning("Blocking detected on %s: %s", url, indicator, extra={'url': url, 'outcome': 'blocked'})
+                RUN_REPORT.record_block(indicator)
                 return False
         
         return True
@@ -283,9 +333,9 @@ class JobScraper:
         """Scrape using requests library with proper headers."""
         try:
             # Add random delay
-            time.sleep(random.uniform(0.5, 1.5))
+            RUN_REPORT.sleep(random.uniform(*REQUESTS_DELAY_RANGE))
             
-            response = self.session.get(url, headers=get_random_headers(), timeout=REQUEST_TIMEOUT)
+            response = self.session.get(url, headers=get_random_headers(url), timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
             
             # Check if we got a valid HTML response
@@ -295,7 +345,8 @@ class JobScraper:
             return None
             
         except Exception as e:
-            logger.debug(f"Requests failed for {url}: {e}")
+            logger.debug("Requests failed for %s: %s", url, e, extra={'url': url, 'tier': 'requests'})
+            RUN_REPORT.record_error('requests', e)
             return None
     
     def _scrape_with_selenium(self, url: str) -> Optional[str]:
@@ -303,6 +354,10 @@ class JobScraper:
         if not self.selenium_initialized:
             return None
             
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
         try:
             self.driver.get(url)
             # Wait for page to load
@@ -311,11 +366,12 @@ class JobScraper:
             )
             
             # Additional wait for dynamic content
-            time.sleep(3)
+            RUN_REPORT.sleep(SELENIUM_SETTLE_SECONDS)
             return self.driver.page_source
             
         except Exception as e:
-            logger.debug(f"Selenium failed for {url}: {e}")
+            logger.debug("Selenium failed for %s: %s", url, e, extra={'url': url, 'tier': 'selenium'})
+            RUN_REPORT.record_error('selenium', e)
             return None
     
     async def _scrape_with_playwright(self, url: str) -> Optional[str]:
@@ -324,10 +380,12 @@ class JobScraper:
             return None
         
         try:
+            # One profile for the whole context, so the user agent, headers and locale agree
+            profile = USER_AGENT_POOL.for_url(url)
             context = await self.browser.new_context(
-                user_agent=get_random_user_agent(),
+                user_agent=profile.user_agent,
                 viewport={'width': 1920, 'height': 1080},
-                locale='en-US',
+                locale=profile.locale,
                 timezone_id='America/New_York'
             )
             
@@ -340,7 +398,7 @@ class JobScraper:
             page = await context.new_page()
             
             # Set extra HTTP headers
-            await page.set_extra_http_headers(get_random_headers())
+            await page.set_extra_http_headers(profile.headers)
             
             # Navigate to URL with realistic timing
             await page.goto(url, wait_until='domcontentloaded', timeout=REQUEST_TIMEOUT * 1000)
@@ -349,7 +407,9 @@ class JobScraper:
             try:
                 await page.wait_for_selector('body', timeout=15000)
                 # Add human-like delay
-                await asyncio.sleep(random.uniform(2, 4))
+                delay = random.uniform(*BROWSER_SETTLE_RANGE)
+                RUN_REPORT.record_sleep(delay)
+                await asyncio.sleep(delay)
             except:
                 pass
                 
@@ -358,23 +418,32 @@ class JobScraper:
             return content
             
         except Exception as e:
-            logger.debug(f"Playwright failed for {url}: {e}")
+            logger.debug("Playwright failed for %s: %s", url, e, extra={'url': url, 'tier': 'playwright'})
+            RUN_REPORT.record_error('playwright', e)
             return None
     
-    def scrape_multiple_urls(self, urls: List[str]) -> List[Dict]:
-        """Scrape multiple URLs with rate limiting."""
+    def scrape_multiple_urls(self, urls: Iterable[str],
+                             on_result: Optional[Callable[[str, Optional[Dict]], None]] = None) -> List[Dict]:
+        """Scrape multiple URLs with rate limiting.
+
+        ``urls`` may be a lazy iterator such as a crawl frontier's claims; ``on_result``
+        is called with each URL and its job, or None if it could not be scraped.
+        """
         jobs = []
         
         for i, url in enumerate(urls):
+            # Rate limiting with progressive backoff
+            if i > 0:
+                sleep_time = URL_DELAY_BASE + ((i - 1) % URL_DELAY_SPREAD)  # Vary between 3-6 seconds by default
+                RUN_REPORT.sleep(sleep_time)
+            
             job = self.scrape_url(url)
+            if on_result:
+                on_result(url, job)
             if job:
                 jobs.append(job)
-                logger.info(f"Successfully scraped job: {job.get('job_title', 'Unknown')} at {job.get('company', 'Unknown')}")
-            
-            # Rate limiting with progressive backoff
-            if i < len(urls) - 1:
-                sleep_time = 3 + (i % 4)  # Vary between 3-6 seconds
-                time.sleep(sleep_time)
+                logger.info("Successfully scraped job: %s at %s", job.get('job_title', 'Unknown'),
+                            job.get('company', 'Unknown'), extra={'url': url})
         
         return jobs
     
@@ -395,7 +464,7 @@ class JobScraper:
             if hasattr(self, 'driver') and self.selenium_initialized:
                 self.driver.quit()
             if self.playwright_initialized:
-                loop = asyncio.get_event_loop()
-                loop.run_until_complete(self._shutdown_playwright())
+                self.loop.run_until_complete(self._shutdown_playwright())
+            self.loop.close()
         except Exception as e:
             logger.error(f"Error closing scraper resources: {e}")
@@ -1,152 +1,539 @@
 import pandas as pd
 from pathlib import Path
-from typing import List, Dict, Union
+from typing import List, Dict, Union, Optional, Iterator, Callable
 from datetime import datetime
 import os
 import json
-from utils import logger
-from config import OUTPUT_CSV_FILE, OUTPUT_JSON_FILE, OUTPUT_EXCEL_FILE, OUTPUT_FORMATS
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from utils import logger, detect_job_board
+from metrics import STORAGE_SECONDS
+from compression import TextCompressor
+from config import (OUTPUT_CSV_FILE, OUTPUT_JSON_FILE, OUTPUT_JSONL_FILE, OUTPUT_EXCEL_FILE,
+                    OUTPUT_FORMATS, STORE_FILE, STORAGE_CHUNK_SIZE, STORE_BUSY_TIMEOUT,
+                    COMPRESS_TEXT_FIELDS, COMPRESSED_TEXT_FIELDS, TEXT_DICT_MIN_SAMPLES, TEXT_DICT_MAX_SAMPLES)
+
+JOB_COLUMNS = [
+    'job_title', 'company', 'location', 'work_setting',
+    'job_type', 'company_logo', 'job_description',
+    'requirements', 'application_url', 'date_posted',
+    'date_collected', 'source_url'
+]
+
+# date_collected is compared as text by retention windows, so it is always stored in this form
+DATE_COLLECTED_FORMAT = '%Y-%m-%d %H:%M:%S'
+DATE_COLLECTED_GLOB = '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]:[0-9][0-9]'
+
+def normalize_date_collected(value) -> str:
+    """Return ``value`` as a ``DATE_COLLECTED_FORMAT`` string, using now if it cannot be parsed."""
+    value = '' if pd.isna(value) else str(value).strip()
+    try:
+        return datetime.strptime(value, DATE_COLLECTED_FORMAT).strftime(DATE_COLLECTED_FORMAT)
+    except ValueError:
+        pass
+    parsed = pd.to_datetime(value, errors='coerce') if value else pd.NaT
+    if pd.isna(parsed):
+        return datetime.now().strftime(DATE_COLLECTED_FORMAT)
+    return parsed.tz_localize(None).strftime(DATE_COLLECTED_FORMAT) if parsed.tzinfo else \
+        parsed.strftime(DATE_COLLECTED_FORMAT)
 
 class JobStorage:
-    def __init__(self, output_formats: List[str] = OUTPUT_FORMATS):
+    def __init__(self, output_formats: List[str] = OUTPUT_FORMATS, store_file: Path = STORE_FILE):
         self.output_formats = output_formats
+        self.store_file = store_file
         self.output_files = {
             'csv': OUTPUT_CSV_FILE,
             'json': OUTPUT_JSON_FILE,
+            'jsonl': OUTPUT_JSONL_FILE,
             'excel': OUTPUT_EXCEL_FILE
         }
-        self.ensure_output_files()
-    
-    def ensure_output_files(self) -> None:
-        """Ensure output files exist with proper structure."""
-        for format in self.output_formats:
-            if format == 'csv' and not self.output_files['csv'].exists():
-                self._create_empty_csv()
-            elif format == 'json' and not self.output_files['json'].exists():
-                self._create_empty_json()
-            # Excel files are created on demand, no need for empty template
-    
-    def _create_empty_csv(self) -> None:
-        """Create empty CSV file with headers."""
-        columns = [
-            'job_title', 'company', 'location', 'work_setting', 
-            'job_type', 'company_logo', 'job_description', 
-            'requirements', 'application_url', 'date_posted', 
-            'date_collected', 'source_url'
+        self.compressor = TextCompressor()
+        self._dictionaries: Dict[int, bytes] = {0: b''}
+        self.ensure_store()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the canonical job store.
+
+        Writes take the database lock up front (``BEGIN IMMEDIATE``) and wait up to
+        ``STORE_BUSY_TIMEOUT`` seconds for it, so several scraper processes can append
+        to the same store safely.
+        """
+        conn = sqlite3.connect(self.store_file, timeout=STORE_BUSY_TIMEOUT, isolation_level='IMMEDIATE')
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a block in a store transaction and close the connection afterwards.
+
+        The write lock is taken before the block runs, because sqlite3 would otherwise
+        only begin the transaction at the first write, leaving earlier reads unguarded.
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                yield conn
+        finally:
+            conn.close()
+
+    def _read_meta(self, key: str) -> Optional[str]:
+        """Return a ``store_meta`` value with a plain read, without taking the write lock."""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT value FROM store_meta WHERE key = ?", (key,)).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def ensure_store(self) -> None:
+        """Ensure the canonical store exists, importing legacy output files on first use."""
+        columns = ', '.join(f'{column} TEXT' for column in JOB_COLUMNS)
+
+        conn = self._connect()
+        try:
+            # WAL lets readers and exports keep a consistent snapshot while other processes write
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.execute(f"CREATE TABLE IF NOT EXISTS jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, {columns})")
+                conn.execute("CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT)")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS text_dictionaries "
+                    "(id INTEGER PRIMARY KEY, board TEXT UNIQUE, data BLOB)"
+                )
+                # Stores created before text compression lack the board and dictionary columns
+                existing = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+                if 'board' not in existing:
+                    conn.execute("ALTER TABLE jobs ADD COLUMN board TEXT")
+                if 'text_dict_id' not in existing:
+                    conn.execute("ALTER TABLE jobs ADD COLUMN text_dict_id INTEGER DEFAULT 0")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_date_collected ON jobs (date_collected)")
+                # Only the process that initializes the store performs the legacy import
+                is_new = conn.execute(
+                    "INSERT OR IGNORE INTO store_meta (key, value) VALUES ('revision', '0')"
+                ).rowcount == 1
+        finally:
+            conn.close()
+
+        self._normalize_collected_dates()
+        if is_new:
+            logger.info(f"Created canonical job store: {self.store_file}")
+            self._import_legacy_outputs()
+
+    def _normalize_collected_dates(self) -> None:
+        """Rewrite ``date_collected`` values not in ``DATE_COLLECTED_FORMAT``, once per store."""
+        if self._read_meta('date_collected_normalized'):
+            return
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM store_meta WHERE key = 'date_collected_normalized'").fetchone():
+                return
+            rows = conn.execute(
+                "SELECT id, date_collected FROM jobs WHERE date_collected IS NULL OR date_collected NOT GLOB ?",
+                (DATE_COLLECTED_GLOB,)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET date_collected = ? WHERE id = ?",
+                [(normalize_date_collected(value), job_id) for job_id, value in rows]
+            )
+            if rows:
+                conn.execute("UPDATE store_meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'revision'")
+            conn.execute("INSERT INTO store_meta (key, value) VALUES ('date_collected_normalized', '1')")
+        if rows:
+            logger.info(f"Normalized date_collected on {len(rows)} stored jobs")
+
+    def _import_legacy_outputs(self) -> None:
+        """Seed a new store from existing CSV or JSON output files."""
+        legacy = self.load_jobs('csv')
+        if legacy.empty:
+            legacy = pd.DataFrame(self.load_jobs('json'))
+        if legacy.empty:
+            return
+
+        self._insert_jobs(legacy.to_dict('records'))
+        logger.info(f"Imported {len(legacy)} jobs from legacy output files into {self.store_file}")
+
+    def _insert_jobs(self, jobs: List[Dict]) -> None:
+        """Append jobs to the store and bump its revision in one transaction."""
+        rows = [
+            {column: '' if pd.isna(job.get(column, '')) else str(job.get(column, '')) for column in JOB_COLUMNS}
+            for job in jobs
         ]
-        df = pd.DataFrame(columns=columns)
-        df.to_csv(self.output_files['csv'], index=False, encoding='utf-8')
-        logger.info(f"Created new CSV output file: {self.output_files['csv']}")
-    
-    def _create_empty_json(self) -> None:
-        """Create empty JSON file."""
-        with open(self.output_files['json'], 'w', encoding='utf-8') as f:
-            json.dump([], f, indent=2, ensure_ascii=False)
-        logger.info(f"Created new JSON output file: {self.output_files['json']}")
-    
+        for row in rows:
+            row['board'] = detect_job_board(row['source_url'] or row['application_url'])
+            row['date_collected'] = normalize_date_collected(row['date_collected'])
+
+        columns = JOB_COLUMNS + ['board', 'text_dict_id']
+        placeholders = ', '.join('?' for _ in columns)
+
+        with self._transaction() as conn:
+            if COMPRESS_TEXT_FIELDS:
+                self._compress_rows(conn, rows)
+            conn.executemany(
+                f"INSERT INTO jobs ({', '.join(columns)}) VALUES ({placeholders})",
+                [tuple(row.get(column, 0) for column in columns) for row in rows]
+            )
+            conn.execute(
+                "UPDATE store_meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'revision'"
+            )
+
+    def _compress_rows(self, conn: sqlite3.Connection, rows: List[Dict]) -> None:
+        """Replace large text fields with compressed blobs using each board's dictionary."""
+        for board in {row['board'] for row in rows}:
+            board_rows = [row for row in rows if row['board'] == board]
+            dict_id = self._get_board_dictionary(conn, board, board_rows)
+            dictionary = self._dictionaries[dict_id]
+
+            for row in board_rows:
+                row['text_dict_id'] = dict_id
+                for field in COMPRESSED_TEXT_FIELDS:
+                    if row[field]:
+                        row[field] = self.compressor.compress(row[field], dictionary)
+
+    def _get_board_dictionary(self, conn: sqlite3.Connection, board: str, rows: List[Dict]) -> int:
+        """Return the dictionary id for a board, training one once enough samples exist.
+
+        Returns 0 (plain zlib) for unknown boards and boards without enough samples yet.
+        """
+        if not board:
+            return 0
+
+        row = conn.execute("SELECT id, data FROM text_dictionaries WHERE board = ?", (board,)).fetchone()
+        if row:
+            self._dictionaries[row[0]] = row[1]
+            return row[0]
+
+        samples = [job[field] for job in rows for field in COMPRESSED_TEXT_FIELDS if job[field]]
+        if len(samples) < TEXT_DICT_MIN_SAMPLES:
+            stored = conn.execute(
+                f"SELECT {', '.join(COMPRESSED_TEXT_FIELDS)}, text_dict_id FROM jobs "
+                "WHERE board = ? ORDER BY id DESC LIMIT ?",
+                (board, TEXT_DICT_MAX_SAMPLES)
+            ).fetchall()
+            for *values, dict_id in stored:
+                samples.extend(self._decode_text(value, dict_id) for value in values if value)
+        if len(samples) < TEXT_DICT_MIN_SAMPLES:
+            return 0
+
+        dictionary = self.compressor.train_dictionary(samples[:TEXT_DICT_MAX_SAMPLES])
+        dict_id = conn.execute(
+            "INSERT INTO text_dictionaries (board, data) VALUES (?, ?)", (board, dictionary)
+        ).lastrowid
+        self._dictionaries[dict_id] = dictionary
+        logger.info(f"Trained {len(dictionary)}-byte text dictionary for {board} from {len(samples)} samples")
+        return dict_id
+
+    def _decode_text(self, value: Union[str, bytes, None], dict_id: Optional[int]) -> str:
+        """Return a text field as a string, decompressing it if it was stored compressed."""
+        if not isinstance(value, bytes):
+            return value or ''
+
+        dict_id = dict_id or 0
+        if dict_id not in self._dictionaries:
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT data FROM text_dictionaries WHERE id = ?", (dict_id,)).fetchone()
+            finally:
+                conn.close()
+            self._dictionaries[dict_id] = row[0] if row else b''
+        return self.compressor.decompress(value, self._dictionaries[dict_id])
+
+    def get_revision(self) -> int:
+        """Return the store revision, incremented on every write."""
+        value = self._read_meta('revision')
+        return int(value) if value else 0
+
+    def _get_export_revision(self, format: str) -> Optional[int]:
+        """Return the store revision the given export was last generated from."""
+        value = self._read_meta(f'export_revision:{format}')
+        return int(value) if value else None
+
     def save_jobs(self, jobs: List[Dict]) -> None:
-        """Save jobs to all configured output formats."""
+        """Append jobs to the canonical store.
+
+        Errors are logged and raised, so callers keep the jobs (and do not record
+        them as seen) when the write fails.
+        """
         if not jobs:
             logger.info("No jobs to save")
             return
-        
+
         try:
-            # Convert to DataFrame for CSV and Excel formats
-            df_new = pd.DataFrame(jobs)
-            
-            for format in self.output_formats:
-                if format == 'csv':
-                    self._save_csv(df_new)
-                elif format == 'json':
-                    self._save_json(jobs)
-                elif format == 'excel':
-                    self._save_excel(df_new)
-                    
-            logger.info(f"Saved {len(jobs)} jobs to {len(self.output_formats)} format(s)")
-            
+            with STORAGE_SECONDS.time(format='store'):
+                self._insert_jobs(jobs)
+            logger.info(f"Saved {len(jobs)} jobs to store: {self.store_file}")
         except Exception as e:
             logger.error(f"Error saving jobs: {e}")
-    
-    def _save_csv(self, df_new: pd.DataFrame) -> None:
-        """Save jobs to CSV file."""
+            raise
+
+    def is_export_stale(self, format: str) -> bool:
+        """Check whether an export is missing or older than the store."""
+        if not self.output_files[format].exists():
+            return True
+        return self._get_export_revision(format) != self.get_revision()
+
+    def export(self, formats: Optional[List[str]] = None, force: bool = False) -> List[str]:
+        """Regenerate derived output files whose store revision is out of date."""
+        formats = formats or self.output_formats
+        stale = [format for format in formats if force or self.is_export_stale(format)]
+
+        if not stale:
+            logger.info(f"All exports are up to date with store revision {self.get_revision()}")
+            return []
+
+        writers = {
+            'csv': self._export_csv,
+            'json': self._export_json,
+            'jsonl': self._export_jsonl,
+            'excel': self._export_excel,
+        }
+
+        # Read every format from one snapshot so concurrent writers cannot tear an export
+        snapshot = self._connect()
         try:
-            output_file = self.output_files['csv']
-            
-            # Read existing data if file exists and has content
-            if output_file.exists() and os.path.getsize(output_file) > 0:
-                df_existing = pd.read_csv(output_file)
-                df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-            else:
-                df_combined = df_new
-            
-            # Save to CSV
-            df_combined.to_csv(output_file, index=False, encoding='utf-8')
-            logger.info(f"Saved {len(df_new)} jobs to CSV: {output_file}")
-            
-        except Exception as e:
-            logger.error(f"Error saving to CSV: {e}")
-    
-    def _save_json(self, jobs: List[Dict]) -> None:
-        """Save jobs to JSON file."""
+            snapshot.execute("BEGIN")
+            revision = int(snapshot.execute("SELECT value FROM store_meta WHERE key = 'revision'").fetchone()[0])
+
+            exported = []
+            for format in stale:
+                if format not in writers:
+                    logger.error(f"Unsupported export format: {format}")
+                    continue
+                try:
+                    with STORAGE_SECONDS.time(format=format):
+                        count = self._publish(format, revision, lambda path: writers[format](path, snapshot))
+                    logger.info(f"Exported {count} jobs to {format}: {self.output_files[format]}")
+                    exported.append(format)
+                except Exception as e:
+                    logger.error(f"Error exporting to {format}: {e}")
+        finally:
+            snapshot.close()
+
+        logger.info(f"Exported {len(exported)} format(s) at store revision {revision}")
+        return exported
+
+    def _publish(self, format: str, revision: int, write: Callable[[Path], int]) -> int:
+        """Write an export to a temporary file and atomically rename it into place.
+
+        The rename and the recorded export revision are committed under the store
+        write lock, and an export older than the one already published is discarded,
+        so readers only ever see complete files that match their recorded revision.
+        """
+        output_file = self.output_files[format]
+        fd, temp_name = tempfile.mkstemp(prefix=f'.{output_file.name}.', suffix='.tmp', dir=output_file.parent)
+        os.close(fd)
+        temp_file = Path(temp_name)
+
         try:
-            output_file = self.output_files['json']
-            
-            # Read existing data if file exists and has content
-            if output_file.exists() and os.path.getsize(output_file) > 0:
-                with open(output_file, 'r', encoding='utf-8') as f:
-                    existing_jobs = json.load(f)
-                combined_jobs = existing_jobs + jobs
-            else:
-                combined_jobs = jobs
-            
-            # Save to JSON with pretty formatting
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(combined_jobs, f, indent=2, ensure_ascii=False, default=str)
-            
-            logger.info(f"Saved {len(jobs)} jobs to JSON: {output_file}")
-            
-        except Exception as e:
-            logger.error(f"Error saving to JSON: {e}")
-    
-    def _save_excel(self, df_new: pd.DataFrame) -> None:
-        """Save jobs to Excel file."""
+            count = write(temp_file)
+            # mkstemp creates owner-only files; keep exports readable like a normal write would
+            os.chmod(temp_file, 0o644)
+            with self._transaction() as conn:
+                row = conn.execute(
+                    "SELECT value FROM store_meta WHERE key = ?", (f'export_revision:{format}',)
+                ).fetchone()
+                if row and int(row[0]) > revision and output_file.exists():
+                    logger.info(f"Skipped publishing {format} export; a newer one is already in place")
+                    return count
+                os.replace(temp_file, output_file)
+                conn.execute(
+                    "INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)",
+                    (f'export_revision:{format}', str(revision))
+                )
+            return count
+        finally:
+            if temp_file.exists():
+                temp_file.unlink()
+
+    def _export_csv(self, output_file: Path, snapshot: sqlite3.Connection) -> int:
+        """Stream all stored jobs to a CSV file."""
+        count = 0
+        with open(output_file, 'w', encoding='utf-8', newline='') as f:
+            pd.DataFrame(columns=JOB_COLUMNS).to_csv(f, index=False)
+            for chunk in self._iter_store(STORAGE_CHUNK_SIZE, JOB_COLUMNS, snapshot):
+                chunk.to_csv(f, index=False, header=False)
+                count += len(chunk)
+        return count
+
+    def _export_json(self, output_file: Path, snapshot: sqlite3.Connection) -> int:
+        """Stream all stored jobs to a JSON file as a pretty-printed array."""
+        count = 0
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write('[')
+            for chunk in self._iter_store(STORAGE_CHUNK_SIZE, JOB_COLUMNS, snapshot):
+                for job in chunk.to_dict('records'):
+                    f.write(',\n  ' if count else '\n  ')
+                    f.write(json.dumps(job, indent=2, ensure_ascii=False, default=str).replace('\n', '\n  '))
+                    count += 1
+            f.write('\n]' if count else ']')
+        return count
+
+    def _export_jsonl(self, output_file: Path, snapshot: sqlite3.Connection) -> int:
+        """Stream all stored jobs to a JSON Lines file, one job per line."""
+        count = 0
+        with open(output_file, 'w', encoding='utf-8') as f:
+            for chunk in self._iter_store(STORAGE_CHUNK_SIZE, JOB_COLUMNS, snapshot):
+                for job in chunk.to_dict('records'):
+                    f.write(json.dumps(job, ensure_ascii=False, default=str) + '\n')
+                    count += 1
+        return count
+
+    def _export_excel(self, output_file: Path, snapshot: sqlite3.Connection) -> int:
+        """Stream all stored jobs to an Excel file."""
+        from openpyxl import Workbook
+        from openpyxl.utils import get_column_letter
+
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet('Jobs')
+
+        # Column widths must be set before rows are streamed, so size them from the store
+        max_lengths = snapshot.execute(
+            f"SELECT {', '.join(f'MAX(LENGTH({column}))' for column in JOB_COLUMNS)} FROM jobs"
+        ).fetchone()
+        for index, (column, max_length) in enumerate(zip(JOB_COLUMNS, max_lengths), start=1):
+            if column in COMPRESSED_TEXT_FIELDS:
+                max_length = 50  # Stored length is compressed; these fields are long text
+            adjusted_width = min(max(len(column), max_length or 0) + 2, 50)  # Cap at 50 characters
+            worksheet.column_dimensions[get_column_letter(index)].width = adjusted_width
+
+        count = 0
+        worksheet.append(JOB_COLUMNS)
+        for chunk in self._iter_store(STORAGE_CHUNK_SIZE, JOB_COLUMNS, snapshot):
+            for row in chunk.itertuples(index=False, name=None):
+                worksheet.append(list(row))
+            count += len(chunk)
+        workbook.save(output_file)
+        return count
+
+    def iter_jobs(self, format: str = 'store', chunksize: int = STORAGE_CHUNK_SIZE,
+                  columns: Optional[List[str]] = None, since: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """Yield jobs from the given format in DataFrame chunks of at most ``chunksize`` rows.
+
+        For the store, ``since`` limits rows to those collected at or after that
+        ``date_collected`` timestamp. Errors reading the source are raised, not
+        logged, so an interrupted stream is never taken for the complete data.
+        """
+        columns = [column for column in (columns or JOB_COLUMNS) if column in JOB_COLUMNS]
+
+        if format == 'store':
+            yield from self._iter_store(chunksize, columns, since=since)
+        elif format == 'csv' and self.output_files['csv'].exists() and os.path.getsize(self.output_files['csv']) > 0:
+            usecols = lambda column: column in columns
+            for chunk in pd.read_csv(self.output_files['csv'], chunksize=chunksize, usecols=usecols,
+                                     dtype=str, keep_default_na=False):
+                yield chunk
+        elif format in ('json', 'jsonl') and self.output_files[format].exists():
+            records = self._iter_json_array(self.output_files['json']) if format == 'json' \
+                else self._iter_json_lines(self.output_files['jsonl'])
+            yield from self._chunk_records(records, chunksize, columns)
+        elif format == 'excel' and self.output_files['excel'].exists():
+            yield from self._chunk_records(self._iter_excel_rows(self.output_files['excel']), chunksize, columns)
+
+    def _iter_store(self, chunksize: int, columns: List[str], conn: Optional[sqlite3.Connection] = None,
+                    since: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """Yield store rows through a cursor, reading ``chunksize`` rows at a time.
+
+        Compressed text fields are only read and decompressed when they are among
+        the requested columns.
+        """
+        compressed = [column for column in columns if column in COMPRESSED_TEXT_FIELDS]
+        owns_connection = conn is None
+        if owns_connection:
+            conn = self._connect()
         try:
-            output_file = self.output_files['excel']
-            
-            # Read existing data if file exists
-            if output_file.exists():
-                df_existing = pd.read_excel(output_file)
-                df_combined = pd.concat([df_existing, df_new], ignore_index=True)
+            query = f"SELECT {', '.join(columns + ['text_dict_id'])} FROM jobs"
+            if since:
+                cursor = conn.execute(f"{query} WHERE date_collected >= ? ORDER BY id", (since,))
             else:
-                df_combined = df_new
-            
-            # Save to Excel with auto column width adjustment
-            with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-                df_combined.to_excel(writer, index=False, sheet_name='Jobs')
-                
-                # Auto-adjust column widths
-                worksheet = writer.sheets['Jobs']
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)  # Cap at 50 characters
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
-            
-            logger.info(f"Saved {len(df_new)} jobs to Excel: {output_file}")
-            
-        except Exception as e:
-            logger.error(f"Error saving to Excel: {e}")
-    
+                cursor = conn.execute(f"{query} ORDER BY id")
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    break
+                chunk = pd.DataFrame.from_records(rows, columns=columns + ['text_dict_id'])
+                for column in compressed:
+                    chunk[column] = [
+                        self._decode_text(value, dict_id)
+                        for value, dict_id in zip(chunk[column], chunk['text_dict_id'])
+                    ]
+                yield chunk.drop(columns='text_dict_id')
+        finally:
+            if owns_connection:
+                conn.close()
+
+    def _chunk_records(self, records: Iterator[Dict], chunksize: int, columns: List[str]) -> Iterator[pd.DataFrame]:
+        """Group an iterator of job dicts into DataFrame chunks."""
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= chunksize:
+                yield pd.DataFrame.from_records(batch).reindex(columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame.from_records(batch).reindex(columns=columns)
+
+    def _iter_json_array(self, path: Path, read_size: int = 1 << 16) -> Iterator[Dict]:
+        """Incrementally decode the objects of a top-level JSON array without loading the whole file."""
+        decoder = json.JSONDecoder()
+        with open(path, 'r', encoding='utf-8') as f:
+            buffer = f.read(read_size).lstrip()
+            if not buffer:
+                return
+            if not buffer.startswith('['):
+                raise ValueError(f"Expected a JSON array in {path}")
+            buffer = buffer[1:]
+            eof = False
+
+            while True:
+                buffer = buffer.lstrip()
+                if buffer.startswith(','):
+                    buffer = buffer[1:].lstrip()
+                if buffer.startswith(']'):
+                    return
+
+                try:
+                    obj, end = decoder.raw_decode(buffer)
+                except json.JSONDecodeError:
+                    # Object is split across reads; pull in more of the file
+                    if eof:
+                        raise
+                    more = f.read(read_size)
+                    eof = not more
+                    buffer += more
+                    continue
+
+                yield obj
+                buffer = buffer[end:]
+
+    def _iter_json_lines(self, path: Path) -> Iterator[Dict]:
+        """Decode a JSON Lines file one line at a time."""
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _iter_excel_rows(self, path: Path) -> Iterator[Dict]:
+        """Read Excel rows one at a time using openpyxl's read-only mode."""
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            for row in rows:
+                yield dict(zip(header, row))
+        finally:
+            workbook.close()
+
     def load_jobs(self, format: str = 'csv') -> Union[pd.DataFrame, List[Dict]]:
         """Load jobs from specified format."""
         try:
-            if format == 'csv' and self.output_files['csv'].exists() and os.path.getsize(self.output_files['csv']) > 0:
+            if format == 'store':
+                chunks = list(self.iter_jobs('store'))
+                return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=JOB_COLUMNS)
+            elif format == 'csv' and self.output_files['csv'].exists() and os.path.getsize(self.output_files['csv']) > 0:
                 return pd.read_csv(self.output_files['csv'])
             elif format == 'json' and self.output_files['json'].exists() and os.path.getsize(self.output_files['json']) > 0:
                 with open(self.output_files['json'], 'r', encoding='utf-8') as f:
@@ -154,13 +541,13 @@ class JobStorage:
             elif format == 'excel' and self.output_files['excel'].exists():
                 return pd.read_excel(self.output_files['excel'])
             else:
-                if format == 'csv':
+                if format in ('csv', 'store'):
                     return pd.DataFrame()
                 else:
                     return []
         except Exception as e:
             logger.error(f"Error loading jobs from {format}: {e}")
-            if format == 'csv':
+            if format in ('csv', 'store'):
                 return pd.DataFrame()
             else:
-                return []
\ No newline at end of file
+                return []
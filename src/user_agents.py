@@ -0,0 +1,152 @@
+import random
+import re
+import threading
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from utils import logger
+from config import USER_AGENTS, USER_AGENT_POOL_SIZE, USER_AGENT_REFRESH_HOURS, USER_AGENT_STICKY_PER_DOMAIN
+
+# (Playwright locale, Accept-Language) pairs a profile is given one of
+LANGUAGES = [
+    ('en-US', 'en-US,en;q=0.9'),
+    ('en-US', 'en-US,en;q=0.8'),
+    ('en-GB', 'en-GB,en;q=0.9,en-US;q=0.8'),
+    ('en-CA', 'en-CA,en;q=0.9,en-US;q=0.8'),
+]
+
+class HeaderProfile:
+    """A coherent browser fingerprint: user agent, language and matching client hints.
+
+    Chromium-based user agents get ``sec-ch-ua`` hints for the same browser,
+    version and platform; Firefox and Safari, which do not send them, get none.
+    """
+
+    def __init__(self, user_agent: str, locale: str, accept_language: str):
+        self.user_agent = user_agent
+        self.locale = locale
+        self.accept_language = accept_language
+        self.headers = self._build_headers()
+
+    def _build_headers(self) -> Dict[str, str]:
+        headers = {
+            'User-Agent': self.user_agent,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': self.accept_language,
+            'Accept-Encoding': 'gzip, deflate',
+            'DNT': '1',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1',
+            'Sec-Fetch-Dest': 'document',
+            'Sec-Fetch-Mode': 'navigate',
+            'Sec-Fetch-Site': 'none',
+            'Sec-Fetch-User': '?1',
+            'Cache-Control': 'max-age=0',
+            'Referer': 'https://www.google.com/',
+        }
+        chrome = re.search(r'Chrome/(\d+)', self.user_agent)
+        if chrome:
+            if 'Edg/' in self.user_agent:
+                brand = 'Microsoft Edge'
+            elif 'OPR/' in self.user_agent:
+                brand = 'Opera'
+            else:
+                brand = 'Google Chrome'
+            version = chrome.group(1)
+            headers['sec-ch-ua'] = f'"Chromium";v="{version}", "{brand}";v="{version}", "Not-A.Brand";v="99"'
+            headers['sec-ch-ua-mobile'] = '?0'
+            headers['sec-ch-ua-platform'] = f'"{self.platform}"'
+        return headers
+
+    @property
+    def platform(self) -> str:
+        if 'Windows' in self.user_agent:
+            return 'Windows'
+        if 'Mac OS X' in self.user_agent:
+            return 'macOS'
+        return 'Linux'
+
+class UserAgentPool:
+    """Header profiles loaded once and refreshed in the background.
+
+    Drawing a profile is a list lookup. With ``sticky_per_domain``, a host keeps
+    the profile it was first given, so consecutive requests to one board look
+    like the same browser.
+    """
+
+    def __init__(self, size: int = USER_AGENT_POOL_SIZE, refresh_hours: Optional[float] = USER_AGENT_REFRESH_HOURS,
+                 sticky_per_domain: bool = USER_AGENT_STICKY_PER_DOMAIN):
+        self.size = size
+        self.refresh_hours = refresh_hours
+        self.sticky_per_domain = sticky_per_domain
+        self.profiles: List[HeaderProfile] = []
+        self.domain_profiles: Dict[str, HeaderProfile] = {}
+        self.lock = threading.Lock()
+        self.refresher = None
+        self.stopped = threading.Event()
+
+    def _load_user_agents(self) -> List[str]:
+        """Sample desktop user agents from fake_useragent, falling back to the configured list."""
+        try:
+            from fake_useragent import UserAgent
+            ua = UserAgent()
+            agents = {ua.random for _ in range(self.size * 3)}
+            agents = [agent for agent in agents if 'Mobile' not in agent and 'Android' not in agent]
+            if agents:
+                return agents[:self.size]
+        except Exception as e:
+            logger.warning(f"Could not load user agents, using the configured list: {e}")
+        return list(USER_AGENTS)
+
+    def refresh(self) -> None:
+        """Rebuild the profiles; hosts keep their sticky profile until the next refresh."""
+        profiles = [HeaderProfile(agent, *random.choice(LANGUAGES)) for agent in self._load_user_agents()]
+        with self.lock:
+            self.profiles = profiles
+            self.domain_profiles = {}
+        logger.info(f"Loaded {len(profiles)} user agent profiles")
+
+    def _ensure_loaded(self) -> None:
+        if self.profiles:
+            return
+        with self.lock:
+            if self.refresher is None and self.refresh_hours:
+                self.refresher = threading.Thread(target=self._refresh_periodically, name='user-agent-refresh',
+                                                  daemon=True)
+                self.refresher.start()
+        if not self.profiles:
+            self.refresh()
+
+    def _refresh_periodically(self) -> None:
+        while not self.stopped.wait(self.refresh_hours * 3600):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing user agents: {e}")
+
+    def sample(self) -> HeaderProfile:
+        """Return a random profile."""
+        self._ensure_loaded()
+        return random.choice(self.profiles)
+
+    def for_url(self, url: Optional[str]) -> HeaderProfile:
+        """Return the profile for a URL's host: sticky if configured, otherwise a random one."""
+        if not url or not self.sticky_per_domain:
+            return self.sample()
+        self._ensure_loaded()
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            profile = self.domain_profiles.get(host)
+            if profile is None:
+                profile = self.domain_profiles[host] = random.choice(self.profiles)
+        return profile
+
+    def close(self) -> None:
+        """Stop the background refresher and wait for it to exit."""
+        self.stopped.set()
+        with self.lock:
+            refresher, self.refresher = self.refresher, None
+        if refresher:
+            refresher.join()
+
+USER_AGENT_POOL = UserAgentPool()
@@ -1,47 +1,154 @@
+import atexit
+import copy
+import csv
+import glob
+import json
 import logging
+import queue
 import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import random
 from functools import wraps
-from typing import List, Optional
-import pandas as pd
+from itertools import islice
+from typing import List, Optional, Dict, Iterable, Iterator, Union
 from pathlib import Path
-from fake_useragent import UserAgent
 
 from config import DATA_DIR, LOGS_DIR, USER_AGENTS
-import random, asyncio
-from config import USER_AGENTS, DELAY_RANGE, USE_RANDOM_DELAYS
+from config import USER_AGENTS, DELAY_RANGE, USE_RANDOM_DELAYS, JOB_BOARD_SELECTORS, JOB_ID_PATTERNS
+from config import DEFAULT_SOURCE_PRIORITY, DEFAULT_MAX_PAGES, SEARCH_PAGE_PARAMS, SEARCH_QUERY_PARAMS
+from config import LOG_FORMAT, LOG_MAX_BYTES, LOG_BACKUP_COUNT
+import re
 
 def get_random_headers():
+    from user_agents import USER_AGENT_POOL
+    profile = USER_AGENT_POOL.sample()
     return {
-        "User-Agent": random.choice(USER_AGENTS),
-        "Accept-Language": "en-US,en;q=0.9",
+        "User-Agent": profile.user_agent,
+        "Accept-Language": profile.accept_language,
     }
 
 async def human_delay():
+    import asyncio
     if USE_RANDOM_DELAYS:
         await asyncio.sleep(random.uniform(*DELAY_RANGE))
 
-def setup_logger(name: str, log_file: str, level=logging.INFO) -> logging.Logger:
-    """Set up logger with file and console handlers."""
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# Structured fields that log calls may pass with ``extra=`` and the JSON format includes
+LOG_FIELDS = ('url', 'board', 'tier', 'latency', 'outcome')
+
+class JsonFormatter(logging.Formatter):
+    """Format each record as one JSON object per line, with any structured fields it carries."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in LOG_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Sent by a worker process, which renders the traceback before pickling the record
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class LazyRotatingFileHandler(RotatingFileHandler):
+    """Rotating file handler that creates the log directory when it first opens the file."""
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+class DeferredQueueHandler(QueueHandler):
+    """Queue records unformatted, so the listener thread formats them with their args and exc_info intact.
+
+    The stock ``prepare`` formats the message on the logging thread and drops
+    ``exc_info``, which would leave ``JsonFormatter`` without an exception to report.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+class ProcessQueueHandler(QueueHandler):
+    """Send records to another process's listener, with the message and traceback rendered so they pickle.
+
+    Unlike the stock ``prepare``, the message keeps no formatting of its own and
+    the traceback goes in ``exc_text``, so the listener's formatter lays both out
+    as it would for a local record.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+# Each logger's background listener, by logger name
+_log_listeners: Dict[str, QueueListener] = {}
+
+def setup_logger(name: str, log_file: str, level=logging.INFO, log_format: str = LOG_FORMAT) -> logging.Logger:
+    """Set up a logger whose rotating file and console handlers run on a background thread.
+
+    Log calls only put the unformatted record on a queue; formatting, including
+    any traceback, and I/O happen in a ``QueueListener`` thread, which is flushed
+    when the process exits.
+    """
+    if log_format == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     
-    # File handler
-    file_handler = logging.FileHandler(LOGS_DIR / log_file)
+    # File handler, rotated by size and only opened when the first record is written
+    file_handler = LazyRotatingFileHandler(LOGS_DIR / log_file, maxBytes=LOG_MAX_BYTES,
+                                           backupCount=LOG_BACKUP_COUNT, encoding='utf-8', delay=True)
     file_handler.setFormatter(formatter)
     
     # Console handler
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
     
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    _log_listeners[name] = listener
+    
     logger = logging.getLogger(name)
     logger.setLevel(level)
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    logger.addHandler(DeferredQueueHandler(log_queue))
     
     return logger
 
 logger = setup_logger('scraper', 'scraper.log')
 
+def listen_for_process_logs(log_queue, name: str = 'scraper') -> QueueListener:
+    """Write records other processes put on ``log_queue`` with this process's handlers for the logger.
+
+    Worker processes log through here, so one process owns the log file and its
+    rotation. Stop the returned listener once those processes have exited.
+    """
+    listener = QueueListener(log_queue, *_log_listeners[name].handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+def log_to_process_queue(log_queue, name: str = 'scraper') -> None:
+    """Send this process's records for the logger to another process's ``listen_for_process_logs``."""
+    logger = logging.getLogger(name)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    listener = _log_listeners.pop(name, None)
+    if listener:
+        atexit.unregister(listener.stop)
+        listener.stop()
+    logger.addHandler(ProcessQueueHandler(log_queue))
+
 def retry(max_retries: int = 3, delay: int = 5, backoff: int = 2):
     """Retry decorator with exponential backoff."""
     def decorator(func):
@@ -63,18 +170,19 @@ def retry(max_retries: int = 3, delay: int = 5, backoff: int = 2):
     return decorator
 
 def get_random_user_agent() -> str:
-    """Get a random user agent."""
-    try:
-        ua = UserAgent()
-        return ua.random
-    except:
-        return random.choice(USER_AGENTS)
+    """Get a random user agent from the shared profile pool."""
+    from user_agents import USER_AGENT_POOL
+    return USER_AGENT_POOL.sample().user_agent
 
 def normalize_url(url: str) -> str:
     """Normalize URL by removing tracking parameters and standardizing."""
     import urllib.parse as urlparse
     from urllib.parse import urlunparse, parse_qs
-    
+
+    # Without a query, params or fragment the round trip below returns the URL unchanged
+    if url.startswith(('http://', 'https://')) and not any(c in url for c in '?;#'):
+        return url
+
     # Parse URL
     parsed = urlparse.urlparse(url)
     
@@ -97,42 +205,172 @@ def normalize_url(url: str) -> str:
     
     return normalized
 
-def read_input_file(file_path: Path) -> List[str]:
-    """Read URLs from input file (CSV, TXT, or Excel)."""
-    urls = []
-    
-    if not file_path.exists():
-        logger.error(f"Input file not found: {file_path}")
-        return urls
-    
-    try:
-        if file_path.suffix.lower() == '.csv':
-            df = pd.read_csv(file_path)
-            # Assume URLs are in a column named 'url' or first column
-            if 'url' in df.columns:
-                urls = df['url'].dropna().tolist()
-            else:
-                urls = df.iloc[:, 0].dropna().tolist()
-                
-        elif file_path.suffix.lower() == '.txt':
-            with open(file_path, 'r') as f:
-                urls = [line.strip() for line in f if line.strip()]
-                
-        elif file_path.suffix.lower() in ['.xlsx', '.xls']:
-            df = pd.read_excel(file_path)
-            if 'url' in df.columns:
-                urls = df['url'].dropna().tolist()
-            else:
-                urls = df.iloc[:, 0].dropna().tolist()
-                
+def detect_job_board(url: str) -> str:
+    """Return the JOB_BOARD_SELECTORS key whose domain a URL belongs to, or '' if unknown."""
+    from urllib.parse import urlsplit
+
+    host = urlsplit(url or '').netloc.lower()
+    for board in JOB_BOARD_SELECTORS:
+        if board in host:
+            return board
+    return ''
+
+def canonical_job_key(url: str) -> str:
+    """Return a stable key for a job page: ``board:job_id`` when the board's job ID
+    can be extracted, otherwise the normalized URL."""
+    board = detect_job_board(url)
+    pattern = JOB_ID_PATTERNS.get(board)
+    if pattern:
+        match = re.search(pattern, url)
+        if match:
+            return f"{board}:{match.group(1)}"
+    return normalize_url(url)
+
+def is_search_url(url: str) -> bool:
+    """Whether a URL is a search results page rather than a single job page.
+
+    Besides 'search' or 'results' in the URL, a board's ``SEARCH_QUERY_PARAMS``
+    mark a search page, such as Indeed's ``/jobs?q=``.
+    """
+    from urllib.parse import urlsplit, parse_qs
+
+    if 'search' in url or 'results' in url:
+        return True
+    query = parse_qs(urlsplit(url).query)
+    return any(param in query for param in SEARCH_QUERY_PARAMS.get(detect_job_board(url), []))
+
+def paginate_search_url(url: str, page: int) -> Optional[str]:
+    """Return the URL of a search results page (0-based), or None if the board's paging is unknown."""
+    from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+
+    if page == 0:
+        return url
+    paging = SEARCH_PAGE_PARAMS.get(detect_job_board(url))
+    if not paging:
+        return None
+    param, step, first = paging
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    query[param] = [str(first + page * step)]
+    return urlunparse(parsed._replace(query=urlencode(query, doseq=True)))
+
+InputPaths = Union[str, Path, Iterable[Union[str, Path]]]
+
+def expand_input_paths(paths: InputPaths) -> Iterator[Path]:
+    """Yield the input files named by a path, a glob pattern, or a list of either."""
+    if isinstance(paths, (str, Path)):
+        paths = [paths]
+    for path in paths:
+        if glob.has_magic(str(path)):
+            matches = sorted(glob.glob(str(path)))
+            if not matches:
+                logger.error(f"No input files match: {path}")
+            yield from (Path(match) for match in matches)
+        elif Path(path).exists():
+            yield Path(path)
         else:
-            logger.error(f"Unsupported file format: {file_path.suffix}")
-            
-    except Exception as e:
-        logger.error(f"Error reading input file: {e}")
-        
-    # Normalize URLs
-    normalized_urls = [normalize_url(url) for url in urls if url]
-    logger.info(f"Read {len(normalized_urls)} URLs from {file_path}")
-    
-    return normalized_urls
\ No newline at end of file
+            logger.error(f"Input file not found: {path}")
+
+def _cell(value):
+    """Return a cell value, or None for blanks (empty strings, None and NaN)."""
+    if value is None or value != value:
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+def _table_rows(rows: Iterator[tuple]) -> Iterator[Dict]:
+    """Turn a header row followed by data rows into dicts, with the URL column under 'url'."""
+    header = [str(name).strip() if name is not None else '' for name in next(rows, ())]
+    url_index = header.index('url') if 'url' in header else 0
+    for row in rows:
+        if len(row) > url_index:
+            record = dict(zip(header, row))
+            record['url'] = row[url_index]
+            yield record
+
+def _iter_input_rows(file_path: Path) -> Iterator[Dict]:
+    """Yield the rows of one input file (CSV, TXT or Excel) one at a time."""
+    suffix = file_path.suffix.lower()
+    if suffix == '.txt':
+        with open(file_path, 'r', encoding='utf-8') as f:
+            yield from ({'url': line} for line in f)
+    elif suffix == '.csv':
+        with open(file_path, 'r', newline='', encoding='utf-8') as f:
+            yield from _table_rows(csv.reader(f))
+    elif suffix == '.xlsx':
+        from openpyxl import load_workbook
+        workbook = load_workbook(file_path, read_only=True)
+        try:
+            yield from _table_rows(workbook.active.iter_rows(values_only=True))
+        finally:
+            workbook.close()
+    elif suffix == '.xls':
+        # The legacy format has no streaming reader, so it is loaded whole
+        import pandas as pd
+        df = pd.read_excel(file_path)
+        yield from _table_rows(iter([tuple(df.columns)] + list(df.itertuples(index=False, name=None))))
+    else:
+        logger.error(f"Unsupported file format: {file_path.suffix}")
+
+def _number(value, cast, default, column: str, url: str):
+    value = _cell(value)
+    if value is None:
+        return default
+    try:
+        return cast(float(value))
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring invalid {column} {value!r} for {url}")
+        return default
+
+def iter_input_sources(paths: InputPaths) -> Iterator[Dict]:
+    """Stream sources from input files, skipping URLs already read (after normalization).
+
+    ``paths`` may be a file, a glob such as ``data/seeds/*.csv``, or a list of
+    either. Rows are read one at a time, so large seed lists start immediately.
+    CSV and Excel files may have ``source``, ``interval`` (hours), ``priority``
+    and ``max_pages`` columns next to ``url``. A missing interval is left as None
+    so the scheduler's default applies; other missing values use the configured
+    defaults.
+    """
+    seen = set()
+    for file_path in expand_input_paths(paths):
+        count = 0
+        try:
+            for row in _iter_input_rows(file_path):
+                url = _cell(row.get('url'))
+                if not url:
+                    continue
+                url = normalize_url(str(url))
+                if url in seen:
+                    continue
+                seen.add(url)
+                count += 1
+                yield {
+                    'url': url,
+                    'source': _cell(row.get('source')) or detect_job_board(url),
+                    'interval': _number(row.get('interval'), float, None, 'interval', url),
+                    'priority': _number(row.get('priority'), int, DEFAULT_SOURCE_PRIORITY, 'priority', url),
+                    'max_pages': max(1, _number(row.get('max_pages'), int, DEFAULT_MAX_PAGES, 'max_pages', url)),
+                }
+        except Exception as e:
+            logger.error(f"Error reading input file {file_path}: {e}")
+        logger.info(f"Read {count} new URLs from {file_path}")
+
+def read_input_sources(paths: InputPaths) -> List[Dict]:
+    """Read every source from the input files; see ``iter_input_sources``."""
+    return list(iter_input_sources(paths))
+
+def read_input_file(paths: InputPaths) -> List[str]:
+    """Read the unique, normalized URLs from input files (CSV, TXT, or Excel)."""
+    return [source['url'] for source in iter_input_sources(paths)]
+
+def batched(iterable: Iterable, size: int) -> Iterator[List]:
+    """Yield lists of up to ``size`` items from an iterable, consuming it lazily."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
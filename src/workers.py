@@ -0,0 +1,126 @@
+import multiprocessing
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import urlparse
+
+from utils import logger, listen_for_process_logs, log_to_process_queue
+from report import RUN_REPORT
+from metrics import REGISTRY
+from config import FRONTIER_FILE, RATE_LIMIT_FILE, HOST_MIN_INTERVAL_SECONDS, STORE_BUSY_TIMEOUT
+
+class HostRateLimiter:
+    """Per-host request spacing shared by every process on the machine.
+
+    Each fetch reserves the host's next free slot in a SQLite table with a single
+    atomic upsert, then sleeps until that slot, so N workers together never
+    hit a host more often than once per ``min_interval`` seconds.
+    """
+
+    def __init__(self, rate_limit_file: Path = RATE_LIMIT_FILE, min_interval: float = HOST_MIN_INTERVAL_SECONDS):
+        self.min_interval = min_interval
+        self.conn = sqlite3.connect(rate_limit_file, timeout=STORE_BUSY_TIMEOUT, isolation_level='IMMEDIATE')
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS host_slots (host TEXT PRIMARY KEY, next_slot REAL)")
+
+    def wait(self, url: str) -> float:
+        """Block until this process may fetch from the URL's host and return how long it waited."""
+        host = urlparse(url).netloc.lower()
+        now = time.time()
+        # One upsert reserves the slot, so concurrent workers cannot read the same free slot
+        with self.conn:
+            next_slot = self.conn.execute(
+                "INSERT INTO host_slots (host, next_slot) VALUES (?, ?) "
+                "ON CONFLICT(host) DO UPDATE SET next_slot = MAX(next_slot, ?) + ? RETURNING next_slot",
+                (host, now + self.min_interval, now, self.min_interval)
+            ).fetchone()[0]
+        delay = next_slot - self.min_interval - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def close(self) -> None:
+        self.conn.close()
+
+def worker_main(worker_id: int, frontier_file: Path = FRONTIER_FILE,
+                stats: Optional['multiprocessing.Queue'] = None,
+                log_queue: Optional['multiprocessing.Queue'] = None) -> None:
+    """Claim job URLs from the frontier and scrape them with this process's own browser until none are left.
+
+    After each page the worker's run report figures and metrics are sent on
+    ``stats``, so the coordinator's report and metrics endpoint cover every worker.
+    Log records go on ``log_queue`` for the coordinator to write.
+    """
+    if log_queue is not None:
+        log_to_process_queue(log_queue)
+    # Imported here so the coordinator does not pay for Playwright and Selenium imports twice
+    from scraper import JobScraper
+    from frontier import CrawlFrontier
+
+    def send_stats() -> None:
+        if stats is not None:
+            stats.put({'report': RUN_REPORT.drain(), 'metrics': REGISTRY.drain()})
+
+    frontier = CrawlFrontier(frontier_file)
+    limiter = HostRateLimiter()
+    scraper = JobScraper(use_selenium=False, use_playwright=True)
+    scraped = 0
+    try:
+        for url in iter(frontier.claim, None):
+            limiter.wait(url)
+            job = scraper.scrape_url(url)
+            if job:
+                frontier.complete(url, job)
+                scraped += 1
+            else:
+                frontier.fail(url, 'scrape failed')
+            send_stats()
+    finally:
+        scraper.close()
+        limiter.close()
+        frontier.close()
+        send_stats()
+        logger.info(f"Worker {worker_id} finished: {scraped} jobs scraped")
+
+def collect_stats(stats: 'multiprocessing.Queue') -> None:
+    """Merge the figures workers send into this process's run report and metrics until ``None`` arrives."""
+    for message in iter(stats.get, None):
+        RUN_REPORT.merge(message['report'])
+        REGISTRY.merge(message['metrics'])
+
+def run_workers(num_workers: int, frontier_file: Path = FRONTIER_FILE) -> List[int]:
+    """Drain the frontier with ``num_workers`` scraper processes and return their exit codes.
+
+    Workers only record results in the frontier; the caller remains the single
+    writer to the job store. Their run report figures and metrics are merged
+    into the caller's ``RUN_REPORT`` and ``REGISTRY`` as they arrive.
+    """
+    # Spawn rather than fork so no event loop or browser state is inherited from the coordinator
+    context = multiprocessing.get_context('spawn')
+    stats = context.Queue()
+    # Workers' log records are written by this process, so only one process writes and rotates the log file
+    log_queue = context.Queue()
+    log_listener = listen_for_process_logs(log_queue)
+    # Read while the workers run, so none blocks on a full pipe before it can exit
+    collector = threading.Thread(target=collect_stats, args=(stats,), name='worker-stats', daemon=True)
+    collector.start()
+    processes = [
+        context.Process(target=worker_main, args=(worker_id, frontier_file, stats, log_queue),
+                        name=f'scraper-worker-{worker_id}')
+        for worker_id in range(num_workers)
+    ]
+    logger.info(f"Starting {num_workers} scraper worker processes")
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        if process.exitcode != 0:
+            logger.error(f"{process.name} exited with code {process.exitcode}")
+    # Every worker flushed its queue before exiting, so this arrives after their last figures
+    stats.put(None)
+    collector.join()
+    log_listener.stop()
+    return [process.exitcode for process in processes]
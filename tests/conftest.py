@@ -0,0 +1,17 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# The modules under src/ import each other by name, and config reads its directories
+# at import time, so point them at scratch directories before any test imports them
+SRC_DIR = Path(__file__).resolve().parent.parent / 'src'
+sys.path.insert(0, str(SRC_DIR))
+
+SCRATCH_DIR = Path(tempfile.mkdtemp(prefix='job-scraper-tests-'))
+os.environ.setdefault('SCRAPER_DATA_DIR', str(SCRATCH_DIR / 'data'))
+os.environ.setdefault('SCRAPER_LOGS_DIR', str(SCRATCH_DIR / 'logs'))
+
+from config import ensure_directories  # noqa: E402
+
+ensure_directories()
@@ -0,0 +1,135 @@
+import multiprocessing
+import socket
+import threading
+import time
+
+import pytest
+
+from dedup_index import CompactHashSet, HashIndex
+from dedup_service import DedupServer, RemoteHashSet, serve, shard_for
+from deduplicator import hash_keys
+
+@pytest.fixture
+def shards():
+    """Start two in-memory dedup shards on ephemeral ports."""
+    servers = [DedupServer(('127.0.0.1', 0), CompactHashSet()) for _ in range(2)]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield servers
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+@pytest.fixture
+def remote(shards):
+    hash_set = RemoteHashSet(addresses=[f'127.0.0.1:{server.server_address[1]}' for server in shards],
+                             batch_size=3)
+    yield hash_set
+    hash_set.close()
+
+def test_check_and_add_reports_known_hashes(remote):
+    job_hashes = hash_keys([f'job {i}' for i in range(10)])
+
+    assert remote.check_and_add(job_hashes[:6]).tolist() == [False] * 6
+    assert remote.check_and_add(job_hashes).tolist() == [True] * 6 + [False] * 4
+    assert len(remote) == 10
+
+def test_hashes_are_routed_to_their_shard(shards, remote):
+    job_hashes = hash_keys([f'job {i}' for i in range(20)])
+    remote.add_many(job_hashes)
+
+    for shard, server in enumerate(shards):
+        owned = [job_hash for job_hash in job_hashes if shard_for(job_hash, len(shards)) == shard]
+        assert len(server.backend) == len(owned)
+        assert server.backend.contains_many(owned).all()
+
+def test_contains_many_does_not_add(remote):
+    job_hashes = hash_keys(['a', 'b'])
+
+    assert remote.contains_many(job_hashes).tolist() == [False, False]
+    assert len(remote) == 0
+
+def test_completeness_requires_every_shard(shards, remote):
+    assert not remote.is_complete
+    shards[0].backend.mark_complete()
+    assert not remote.is_complete
+    remote.mark_complete()
+    assert remote.is_complete
+
+def test_persistent_shard(tmp_path):
+    backend = HashIndex(tmp_path / 'shard.db')
+    server = DedupServer(('127.0.0.1', 0), backend)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    remote = RemoteHashSet(addresses=[f'127.0.0.1:{server.server_address[1]}'])
+    try:
+        job_hashes = hash_keys(['x', 'y'])
+        remote.add_many(job_hashes)
+        assert remote.contains_many(job_hashes + hash_keys(['z'])).tolist() == [True, True, False]
+    finally:
+        remote.close()
+        server.shutdown()
+        server.server_close()
+        backend.close()
+
+def test_remove_many_releases_claims(remote):
+    job_hashes = hash_keys(['a', 'b', 'c'])
+    remote.check_and_add(job_hashes)
+    remote.remove_many(job_hashes[:2])
+
+    assert remote.check_and_add(job_hashes).tolist() == [False, False, True]
+
+def test_completion_is_tracked_per_host(shards):
+    addresses = [f'127.0.0.1:{server.server_address[1]}' for server in shards]
+    first = RemoteHashSet(addresses=addresses, host_id='host-a')
+    second = RemoteHashSet(addresses=addresses, host_id='host-b')
+    try:
+        first.mark_complete()
+        assert first.is_complete
+        assert not second.is_complete
+    finally:
+        first.close()
+        second.close()
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _wait_for_port(port: int, timeout: float = 30) -> None:
+    deadline = time.time() + timeout
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.1)
+
+def test_hosts_share_a_service_running_in_other_processes(tmp_path):
+    context = multiprocessing.get_context('spawn')
+    ports = [_free_port(), _free_port()]
+    processes = [
+        context.Process(target=serve, args=('127.0.0.1', ports[0]), daemon=True),
+        context.Process(target=serve, args=('127.0.0.1', ports[1], tmp_path / 'shard.db'), daemon=True),
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for port in ports:
+            _wait_for_port(port)
+        addresses = [f'127.0.0.1:{port}' for port in ports]
+        first = RemoteHashSet(addresses=addresses, host_id='host-a')
+        second = RemoteHashSet(addresses=addresses, host_id='host-b')
+        job_hashes = hash_keys([f'job {i}' for i in range(50)])
+
+        assert not first.check_and_add(job_hashes[:30]).any()
+        # The second host sees every job the first claimed, and claims only the rest
+        assert second.check_and_add(job_hashes).tolist() == [True] * 30 + [False] * 20
+        assert len(first) == 50
+        first.close()
+        second.close()
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
@@ -0,0 +1,80 @@
+import pytest
+
+from frontier import CrawlFrontier, PENDING, IN_FLIGHT, DONE, FAILED
+
+@pytest.fixture
+def frontier(tmp_path):
+    crawl_frontier = CrawlFrontier(tmp_path / 'frontier.db', max_attempts=2, retry_backoff_minutes=0)
+    yield crawl_frontier
+    crawl_frontier.close()
+
+def test_claim_and_complete(frontier):
+    assert frontier.add({'https://a/1': 'src', 'https://a/2': 'src'}) == 2
+    assert frontier.add({'https://a/1': 'src'}) == 0
+
+    url = frontier.claim()
+    assert url == 'https://a/1'
+    assert frontier.counts()[IN_FLIGHT] == 1
+
+    frontier.complete(url, {'job_title': 'Engineer', 'source_url': url})
+    assert frontier.results() == [('src', {'job_title': 'Engineer', 'source_url': url})]
+    assert frontier.clear_done() == 1
+    assert frontier.counts() == {PENDING: 1, IN_FLIGHT: 0, DONE: 0, FAILED: 0}
+
+def test_complete_fills_fields_from_partial_job(frontier):
+    frontier.add({'https://a/1': 'src'}, {'https://a/1': {'company': 'Acme', 'job_title': 'Card title'}})
+    url = frontier.claim()
+    frontier.complete(url, {'job_title': 'Engineer', 'company': ''})
+
+    assert frontier.results()[0][1] == {'job_title': 'Engineer', 'company': 'Acme'}
+
+def test_failed_urls_are_retried_up_to_max_attempts(frontier):
+    frontier.add({'https://a/1': 'src'})
+
+    frontier.fail(frontier.claim(), 'timeout')
+    assert frontier.counts()[FAILED] == 1
+    assert frontier.claim() == 'https://a/1'
+
+    frontier.fail('https://a/1', 'timeout')
+    assert frontier.claim() is None
+    assert frontier.counts()[FAILED] == 1
+
+def test_failed_urls_wait_for_backoff(tmp_path):
+    crawl_frontier = CrawlFrontier(tmp_path / 'frontier.db', retry_backoff_minutes=60)
+    crawl_frontier.add({'https://a/1': 'src'})
+    crawl_frontier.fail(crawl_frontier.claim(), 'timeout')
+
+    assert crawl_frontier.claim() is None
+    crawl_frontier.close()
+
+def test_recover_returns_in_flight_urls(frontier):
+    frontier.add({'https://a/1': 'src'})
+    frontier.claim()
+
+    assert frontier.recover() == 1
+    assert frontier.counts()[PENDING] == 1
+    assert frontier.claim() == 'https://a/1'
+
+def test_discard_pending_keeps_results(frontier):
+    frontier.add({'https://a/1': 'src', 'https://a/2': 'src'})
+    frontier.complete(frontier.claim(), {'job_title': 'Engineer'})
+
+    assert frontier.discard_pending() == 1
+    assert frontier.counts()[DONE] == 1
+
+def test_expire_failed_forgets_exhausted_urls(tmp_path):
+    crawl_frontier = CrawlFrontier(tmp_path / 'frontier.db', max_attempts=1, failed_cooldown_hours=0)
+    crawl_frontier.add({'https://a/1': 'src'})
+    crawl_frontier.fail(crawl_frontier.claim(), 'timeout')
+
+    assert crawl_frontier.expire_failed() == 1
+    assert crawl_frontier.add({'https://a/1': 'src'}) == 1
+    crawl_frontier.close()
+
+def test_fetched_urls_leave_out_card_jobs(frontier):
+    frontier.add({'https://a/1': 'src'})
+    frontier.add_done({'https://a/2': ('src', {'job_title': 'From card'})})
+    frontier.complete(frontier.claim(), {'job_title': 'Engineer'})
+
+    assert len(frontier.results()) == 2
+    assert frontier.fetched_urls() == ['https://a/1']
@@ -0,0 +1,22 @@
+import json
+import logging
+import pickle
+import queue
+
+from utils import JsonFormatter, ProcessQueueHandler
+
+def test_process_queue_handler_sends_picklable_records_with_their_traceback():
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger('test-process-queue')
+    logger.addHandler(ProcessQueueHandler(log_queue))
+    try:
+        raise ValueError('bad page')
+    except ValueError:
+        logger.exception("Failed to parse %s", 'https://a/1', extra={'board': 'indeed'})
+
+    record = pickle.loads(pickle.dumps(log_queue.get()))
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry['message'] == 'Failed to parse https://a/1'
+    assert entry['board'] == 'indeed'
+    assert 'ValueError: bad page' in entry['exception']
+    assert 'ValueError: bad page' in logging.Formatter().format(record)
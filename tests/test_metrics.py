@@ -0,0 +1,28 @@
+from metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+def make_registry():
+    registry = MetricsRegistry()
+    Counter('fetches_total', 'Fetches', ['tier'], registry=registry)
+    Gauge('lag_seconds', 'Lag', registry=registry)
+    Histogram('fetch_seconds', 'Fetch time', ['tier'], buckets=(1, 5), registry=registry)
+    return registry
+
+def test_merge_adds_a_drained_worker_registry():
+    worker, coordinator = make_registry(), make_registry()
+    fetches, lag, fetch_seconds = worker.metrics
+    fetches.inc(tier='requests')
+    lag.set(3)
+    fetch_seconds.observe(0.5, tier='requests')
+    fetch_seconds.observe(7, tier='requests')
+    coordinator.metrics[0].inc(2, tier='requests')
+    coordinator.metrics[2].observe(2, tier='requests')
+
+    coordinator.merge(worker.drain())
+    rendered = coordinator.render()
+
+    assert 'fetches_total{tier="requests"} 3' in rendered
+    assert 'lag_seconds 3' in rendered
+    assert 'fetch_seconds_bucket{tier="requests",le="1"} 1' in rendered
+    assert 'fetch_seconds_bucket{tier="requests",le="5"} 2' in rendered
+    assert 'fetch_seconds_count{tier="requests"} 3' in rendered
+    assert worker.drain() == {}
@@ -0,0 +1,43 @@
+from parser import HTMLParser
+
+MONSTER_JOB_URL = 'https://www.monster.com/job-openings/engineer-austin-tx--0a1b2c3d-1111-2222-3333-444455556666'
+
+def test_job_page_selectors_fill_job_fields_and_resolve_links_against_the_page():
+    html = '''<html><body>
+        <h2 class="title">Software Engineer</h2>
+        <div class="company">Acme Corp</div>
+        <div class="location">Austin, TX</div>
+        <div class="summary">Build and run our services.</div>
+        <a class="job-link" href="/apply/123">Apply</a>
+    </body></html>'''
+
+    job = HTMLParser().parse_job_page(html, MONSTER_JOB_URL)
+
+    assert job['job_title'] == 'Software Engineer'
+    assert job['company'] == 'Acme Corp'
+    assert job['job_description'] == 'Build and run our services.'
+    assert job['application_url'] == 'https://www.monster.com/apply/123'
+    assert job['source_url'] == MONSTER_JOB_URL
+
+def test_search_cards_fill_job_fields_and_resolve_links_against_the_page():
+    html = '''<html><body><ul>
+        <li><a class="job-link" href="/job-openings/a"><h2 class="title">Data Analyst</h2></a>
+            <div class="company">Globex</div></li>
+        <li><a class="job-link" href="/job-openings/b"><h2 class="title">QA Engineer</h2></a>
+            <div class="company">Initech</div></li>
+    </ul></body></html>'''
+
+    jobs = HTMLParser().parse_search_results(html, 'https://www.monster.com/jobs/search?q=analyst')
+
+    assert [(job['job_title'], job['company'], job['source_url']) for job in jobs] == [
+        ('Data Analyst', 'Globex', 'https://www.monster.com/job-openings/a'),
+        ('QA Engineer', 'Initech', 'https://www.monster.com/job-openings/b'),
+    ]
+
+def test_generic_parsing_resolves_the_logo_against_the_page():
+    html = '''<html><body><h1>Platform Engineer</h1><img alt="company logo" src="/static/logo.png"></body></html>'''
+
+    job = HTMLParser().parse_job_page(html, 'https://careers.example.org/openings/42')
+
+    assert job['job_title'] == 'Platform Engineer'
+    assert job['company_logo'] == 'https://careers.example.org/static/logo.png'
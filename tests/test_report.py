@@ -0,0 +1,31 @@
+from report import RunReport
+
+def test_merge_adds_a_drained_worker_report():
+    worker = RunReport()
+    worker.record_fetch('playwright', 0.5, 'success', 1000)
+    worker.record_block('captcha')
+    worker.record_error('playwright', TimeoutError('Timeout 30000ms exceeded'))
+    worker.count_urls('indeed', 'fetched')
+    worker.record_sleep(2.0)
+
+    coordinator = RunReport()
+    coordinator.record_fetch('playwright', 1.5, 'success', 500)
+    coordinator.merge(worker.drain())
+    report = coordinator.to_dict()
+
+    assert report['tiers']['playwright']['attempts'] == 2
+    assert report['tiers']['playwright']['bytes'] == 1500
+    assert report['tiers']['playwright']['fetch_seconds']['p99'] == 1.5
+    assert report['block_indicators'] == {'captcha': 1}
+    assert report['errors'] == {'playwright': {'Timeout 30000ms exceeded': 1}}
+    assert report['urls'] == {'indeed': {'fetched': 1}}
+    assert report['sleep_seconds'] == 0
+
+def test_drain_starts_the_figures_afresh():
+    report = RunReport()
+    started_at = report.started_at
+    report.record_parse(0.1)
+    report.drain()
+
+    assert report.parse_seconds == []
+    assert report.started_at == started_at